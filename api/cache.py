@@ -0,0 +1,73 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+
+    """Thread-safe LRU cache whose entries also expire after a time-to-live."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 300.0):
+        """
+        Attributes
+        ----------
+            maxsize (int): Maximum number of entries kept before the least recently used one is evicted
+            ttl (float): Seconds an entry stays valid after it was set
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Get a cached value.
+
+        Args:
+        ----
+            key (Hashable): The cache key.
+
+        Returns:
+        -------
+            object or None: The cached value, or None if missing or expired.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """
+        Cache a value, evicting the least recently used entry if full.
+
+        Args:
+        ----
+            key (Hashable): The cache key.
+            value (object): The value to cache.
+        """
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, predicate=None):
+        """
+        Drop cached entries.
+
+        Args:
+        ----
+            predicate (Callable[[Hashable], bool] | None): Drop only keys it returns True for, or every key if None.
+        """
+        with self._lock:
+            if predicate is None:
+                self._entries.clear()
+                return
+            for key in [key for key in self._entries if predicate(key)]:
+                del self._entries[key]
@@ -0,0 +1,296 @@
+import hashlib
+import json
+import os
+import select
+import threading
+import time
+from datetime import datetime, timezone
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, quote, unquote, urlparse
+
+import psycopg2
+from dotenv import load_dotenv
+from psycopg2.pool import PoolError, ThreadedConnectionPool
+
+from api.cache import TTLCache
+from scraper.credentials import get_secret_payload
+from scraper.utils import read_sql_file
+
+# using .env, load DB variables
+load_dotenv()
+BASE_SQL_PATH = "scraper/sql"
+DB_HOSTNAME = os.getenv("DB_HOSTNAME")
+DB_USERNAME = os.getenv("DB_USERNAME")
+DB_DATABASE = os.getenv("DB_DATABASE")
+DB_PORT = os.getenv("DB_PORT")
+DB_PRICE_TABLE = os.getenv("DB_PRICE_TABLE")
+DB_PRICE_CHANNEL = os.getenv("DB_PRICE_CHANNEL")
+
+API_PORT = int(os.getenv("PORT", "8080"))
+CACHE_MAXSIZE = int(os.getenv("API_CACHE_MAXSIZE", "1024"))
+CACHE_TTL = float(os.getenv("API_CACHE_TTL", "300"))
+DB_POOL_MAXCONN = int(os.getenv("API_DB_POOL_MAXCONN", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("API_DB_POOL_TIMEOUT", "10"))
+LOAD_LOCK_STRIPES = 64
+HISTORY_DEFAULT_LIMIT = 100
+HISTORY_MAX_LIMIT = 1000
+
+LATEST_KEY = ("latest",)
+
+
+class PriceReader:
+
+    """Serve price reads from an in-process cache, falling back to the DB on a miss."""
+
+    def __init__(self, pool: ThreadedConnectionPool, cache: TTLCache, pool_timeout: float = DB_POOL_TIMEOUT):
+        """
+        Attributes
+        ----------
+            pool (ThreadedConnectionPool): Pool of connections to the PostgreSQL DB
+            cache (TTLCache): Cache of serialized responses and their ETags
+            pool_timeout (float): Seconds a query waits for a free connection before failing with PoolError
+            pool_slots (threading.BoundedSemaphore): Free connections, so queries wait instead of exhausting the pool
+            load_locks (list[threading.Lock]): Locks striped by cache key, so concurrent misses on a key load it once
+            generation (int): Count of invalidations, so a load that overlapped one is not cached
+            generation_lock (threading.Lock): Makes bumping the generation and caching a load atomic
+        """
+        self.pool = pool
+        self.cache = cache
+        self.pool_timeout = pool_timeout
+        self.pool_slots = threading.BoundedSemaphore(pool.maxconn)
+        self.load_locks = [threading.Lock() for _ in range(LOAD_LOCK_STRIPES)]
+        self.generation = 0
+        self.generation_lock = threading.Lock()
+
+    def query(self, sql_file: str, params: dict | None = None):
+        """
+        Run a select query from the sql directory.
+
+        Args:
+        ----
+            sql_file (str): Name of the sql file.
+            params (dict | None): Values bound to the query's `%(name)s` parameters.
+
+        Returns:
+        -------
+            list[dict]: The selected rows.
+
+        Raises:
+        ------
+            psycopg2.Error: If the query fails, or no connection frees up within pool_timeout (PoolError).
+        """
+        query = read_sql_file(f"{BASE_SQL_PATH}/{sql_file}", {"DB_PRICE_TABLE": DB_PRICE_TABLE})
+        if not self.pool_slots.acquire(timeout=self.pool_timeout):
+            raise PoolError(f"No DB connection free after {self.pool_timeout}s")
+        try:
+            connection = self.pool.getconn()
+            broken = False
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(query, params)
+                    columns = [column.name for column in cursor.description]
+                    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+                connection.rollback()
+            except psycopg2.Error:
+                # drop the connection rather than return it to the pool in an unknown state
+                broken = True
+                raise
+            finally:
+                self.pool.putconn(connection, close=broken)
+        finally:
+            self.pool_slots.release()
+        for row in rows:
+            row["msrp"] = float(row["msrp"])
+            row["create_timestamp"] = row["create_timestamp"].isoformat()
+        return rows
+
+    def cached(self, key: tuple, load):
+        """
+        Get a response from the cache, loading and serializing it on a miss.
+
+        Args:
+        ----
+            key (tuple): The cache key.
+            load (Callable[[], dict]): Builds the response payload from the DB.
+
+        Returns:
+        -------
+            tuple[bytes, str]: The JSON body and its ETag.
+        """
+        response = self.cache.get(key)
+        if response is not None:
+            return response
+        with self.load_locks[hash(key) % LOAD_LOCK_STRIPES]:
+            # another request may have loaded the key while this one waited
+            response = self.cache.get(key)
+            if response is None:
+                generation = self.generation
+                body = json.dumps(load()).encode("utf-8")
+                response = (body, f'"{hashlib.md5(body).hexdigest()}"')
+                with self.generation_lock:
+                    # a price committed during the load may be missing from it, so only the next request caches it
+                    if self.generation == generation:
+                        self.cache.set(key, response)
+        return response
+
+    def latest(self):
+        """Get the latest price of every model."""
+        return self.cached(LATEST_KEY, lambda: {"items": self.query("select_evprice_latest.sql")})
+
+    def history(self, brand_name: str, model_name: str, before: datetime | None, limit: int):
+        """
+        Get one page of a model's price history, newest first.
+
+        Args:
+        ----
+            brand_name (str): The brand name.
+            model_name (str): The model name.
+            before (datetime | None): Only return prices created before this timestamp.
+            limit (int): Maximum number of prices in the page.
+
+        Returns:
+        -------
+            tuple[bytes, str]: The JSON body and its ETag.
+        """
+
+        def load():
+            params = {
+                "brand_name": brand_name,
+                "model_name": model_name,
+                "before": before or datetime.max.replace(tzinfo=timezone.utc),
+                "limit": limit,
+            }
+            items = self.query("select_evprice_history.sql", params)
+            next_page = None
+            if len(items) == limit:
+                next_page = (
+                    f"/prices/{quote(brand_name)}/{quote(model_name)}/history"
+                    f"?limit={limit}&before={quote(items[-1]['create_timestamp'])}"
+                )
+            return {"items": items, "next": next_page}
+
+        key = ("history", brand_name, model_name, before, limit)
+        return self.cached(key, load)
+
+    def invalidate_model(self, brand_name: str, model_name: str):
+        """
+        Drop cached responses affected by a new price for a model.
+
+        Args:
+        ----
+            brand_name (str): The brand name.
+            model_name (str): The model name.
+        """
+        self.invalidate(lambda key: key == LATEST_KEY or key[1:3] == (brand_name, model_name))
+
+    def invalidate(self, predicate=None):
+        """
+        Drop cached responses, and keep loads already running from caching what they read before.
+
+        Args:
+        ----
+            predicate (Callable[[tuple], bool] | None): Drop only keys it returns True for, or every key if None.
+        """
+        with self.generation_lock:
+            self.generation += 1
+            self.cache.invalidate(predicate)
+
+    def listen(self, dsn: dict):
+        """
+        Invalidate the cache whenever the scraper notifies of a new MSRP; runs forever in a thread.
+
+        Args:
+        ----
+            dsn (dict): Keyword arguments for psycopg2.connect.
+        """
+        while True:
+            try:
+                connection = psycopg2.connect(**dsn)
+                connection.autocommit = True
+                with connection.cursor() as cursor:
+                    cursor.execute(f"LISTEN {DB_PRICE_CHANNEL}")
+                # notifications may have been missed while disconnected
+                self.invalidate()
+                while True:
+                    if select.select([connection], [], [], 60) == ([], [], []):
+                        continue
+                    connection.poll()
+                    while connection.notifies:
+                        notify = connection.notifies.pop(0)
+                        brand_name, _, model_name = notify.payload.partition("/")
+                        self.invalidate_model(brand_name, model_name)
+            except psycopg2.Error as e:
+                print(f"Error listening for new prices: {e}")
+                time.sleep(5)
+
+
+class PriceRequestHandler(BaseHTTPRequestHandler):
+
+    """Route GET requests to the price reader."""
+
+    reader: PriceReader = None
+
+    def do_GET(self):
+        """Handle a GET request."""
+        url = urlparse(self.path)
+        parts = [unquote(part) for part in url.path.strip("/").split("/")]
+        query = parse_qs(url.query)
+        try:
+            if parts == ["prices", "latest"]:
+                body, etag = self.reader.latest()
+            elif len(parts) == 4 and parts[0] == "prices" and parts[3] == "history":
+                limit = min(int(query.get("limit", [HISTORY_DEFAULT_LIMIT])[0]), HISTORY_MAX_LIMIT)
+                before = query.get("before", [None])[0]
+                if limit < 1:
+                    raise ValueError("limit must be positive")
+                before = datetime.fromisoformat(before) if before else None
+                body, etag = self.reader.history(parts[1].lower(), parts[2].lower(), before, limit)
+            else:
+                self.send_error(HTTPStatus.NOT_FOUND)
+                return
+        except ValueError as e:
+            self.send_error(HTTPStatus.BAD_REQUEST, str(e))
+            return
+        except psycopg2.Error as e:
+            print(f"Error reading prices: {e}")
+            self.send_response(HTTPStatus.SERVICE_UNAVAILABLE)
+            self.send_header("Retry-After", "5")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if self.headers.get("If-None-Match") == etag:
+            self.send_response(HTTPStatus.NOT_MODIFIED)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.send_header("ETag", etag)
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def main():
+    """Start the read API."""
+    dsn = {
+        "host": DB_HOSTNAME,
+        "user": DB_USERNAME,
+        "password": get_secret_payload(),
+        "dbname": DB_DATABASE,
+        "port": DB_PORT,
+    }
+    reader = PriceReader(ThreadedConnectionPool(1, DB_POOL_MAXCONN, **dsn), TTLCache(CACHE_MAXSIZE, CACHE_TTL))
+    threading.Thread(target=reader.listen, args=(dsn,), daemon=True).start()
+
+    PriceRequestHandler.reader = reader
+    server = ThreadingHTTPServer(("", API_PORT), PriceRequestHandler)
+    print(f"Serving prices on port {API_PORT}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
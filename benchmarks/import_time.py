@@ -0,0 +1,55 @@
+import re
+import subprocess
+import sys
+
+# Cumulative import time budget (microseconds) of each module on a cold start path
+IMPORT_TIME_BUDGET_US = {
+    "main": 25_000,
+    "backfill.main": 50_000,
+    "scraper.storage": 50_000,
+}
+RUNS = 5
+
+IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|\s+(\S+)")
+
+
+def measure_import_time(module: str):
+    """
+    Measure a module's cumulative import time with `python -X importtime` in a fresh interpreter.
+
+    Args:
+    ----
+        module (str): The module to import.
+
+    Returns:
+    -------
+        int: The fastest cumulative import time of RUNS runs, in microseconds.
+    """
+    timings = []
+    for _ in range(RUNS):
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        for line in result.stderr.splitlines():
+            match = IMPORT_TIME_LINE.match(line)
+            if match and match.group(3) == module:
+                timings.append(int(match.group(2)))
+    return min(timings)
+
+
+def main():
+    """Check every module's import time against its budget; exits non-zero if any is over."""
+    over_budget = False
+    for module, budget in IMPORT_TIME_BUDGET_US.items():
+        import_time = measure_import_time(module)
+        status = "ok" if import_time <= budget else "OVER BUDGET"
+        over_budget = over_budget or import_time > budget
+        print(f"{module:<20} {import_time / 1000:>8.1f} ms / {budget / 1000:>6.1f} ms  {status}")
+    sys.exit(1 if over_budget else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,190 @@
+import argparse
+import json
+import os
+from datetime import datetime, timezone
+
+import psycopg2
+import pyarrow as pa
+import pyarrow.parquet as pq
+from dotenv import load_dotenv
+
+from scraper.credentials import get_secret_payload
+from scraper.utils import read_sql_file
+
+# using .env, load DB variables
+load_dotenv()
+BASE_SQL_PATH = "scraper/sql"
+DB_HOSTNAME = os.getenv("DB_HOSTNAME")
+DB_USERNAME = os.getenv("DB_USERNAME")
+DB_DATABASE = os.getenv("DB_DATABASE")
+DB_PORT = os.getenv("DB_PORT")
+DB_PRICE_TABLE = os.getenv("DB_PRICE_TABLE")
+
+EXPORT_DIR = "data/ev_price"
+WATERMARK_FILE = "_watermark.json"
+INITIAL_WATERMARK = (datetime(1970, 1, 1, tzinfo=timezone.utc), "")
+# rows inserted less than this long ago may still be invisible behind an uncommitted transaction, so wait for them
+EXPORT_LAG_SECONDS = 300
+
+# brand, model & car type repeat on every row, so store them dictionary-encoded
+EXPORT_SCHEMA = pa.schema(
+    [
+        ("ev_id", pa.string()),
+        ("brand_name", pa.dictionary(pa.int32(), pa.string())),
+        ("model_name", pa.dictionary(pa.int32(), pa.string())),
+        ("car_type", pa.dictionary(pa.int32(), pa.string())),
+        ("model_url", pa.string()),
+        ("image_src", pa.string()),
+        ("image_key", pa.string()),
+        ("msrp", pa.float32()),
+        ("create_timestamp", pa.timestamp("us", tz="UTC")),
+        ("insert_timestamp", pa.timestamp("us", tz="UTC")),
+    ]
+)
+CREATE_TIMESTAMP_INDEX = EXPORT_SCHEMA.get_field_index("create_timestamp")
+
+
+def read_watermark(export_dir: str):
+    """
+    Read the insert_timestamp and ev_id of the last exported row.
+
+    Args:
+    ----
+        export_dir (str): Root directory of the parquet dataset.
+
+    Returns:
+    -------
+        tuple[datetime, str]: The watermark, or the epoch if nothing was exported yet.
+    """
+    watermark_path = os.path.join(export_dir, WATERMARK_FILE)
+    if not os.path.exists(watermark_path):
+        return INITIAL_WATERMARK
+    with open(watermark_path, "r") as f:
+        watermark = json.load(f)
+    if "insert_timestamp" not in watermark:
+        # older watermarks were on create_timestamp, which existing rows' insert_timestamp is migrated from
+        return datetime.fromisoformat(watermark["create_timestamp"]), ""
+    return datetime.fromisoformat(watermark["insert_timestamp"]), watermark["ev_id"]
+
+
+def write_watermark(export_dir: str, watermark: tuple[datetime, str]):
+    """
+    Atomically replace the watermark file.
+
+    Args:
+    ----
+        export_dir (str): Root directory of the parquet dataset.
+        watermark (tuple[datetime, str]): The insert_timestamp and ev_id of the last exported row.
+    """
+    watermark_path = os.path.join(export_dir, WATERMARK_FILE)
+    tmp_path = f"{watermark_path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump({"insert_timestamp": watermark[0].isoformat(), "ev_id": watermark[1]}, f)
+    os.replace(tmp_path, watermark_path)
+
+
+def write_partitions(export_dir: str, rows: list[tuple], part_name: str):
+    """
+    Write a batch of rows into date-partitioned parquet files.
+
+    Args:
+    ----
+        export_dir (str): Root directory of the parquet dataset.
+        rows (list[tuple]): Rows ordered as the columns of EXPORT_SCHEMA.
+        part_name (str): File name shared by every partition written for this batch.
+
+    Returns:
+    -------
+        int: The number of partition files written.
+    """
+    partitions = {}
+    for row in rows:
+        create_date = row[CREATE_TIMESTAMP_INDEX].astimezone(timezone.utc).date().isoformat()
+        partitions.setdefault(create_date, []).append(row)
+
+    for create_date, partition_rows in partitions.items():
+        columns = list(zip(*partition_rows))
+        table = pa.Table.from_arrays(
+            [pa.array(column, type=field.type) for column, field in zip(columns, EXPORT_SCHEMA)],
+            schema=EXPORT_SCHEMA,
+        )
+        partition_dir = os.path.join(export_dir, f"create_date={create_date}")
+        os.makedirs(partition_dir, exist_ok=True)
+        pq.write_table(table, os.path.join(partition_dir, part_name), compression="zstd")
+    return len(partitions)
+
+
+def export_price_history(
+    connection, export_dir: str = EXPORT_DIR, batch_size: int = 100_000, lag_seconds: int = EXPORT_LAG_SECONDS
+):
+    """
+    Export rows inserted since the last watermark into the parquet dataset.
+
+    The watermark is on insert_timestamp rather than create_timestamp, since backfilled and spooled rows are
+    inserted long after they were created, and ties on insert_timestamp are broken by ev_id. Each batch is named after
+    the watermark it started from, so a batch re-run after an interrupted export overwrites its own files instead of
+    duplicating rows.
+
+    Args:
+    ----
+        connection (psycopg2.extensions.connection): Connection to the PostgreSQL DB.
+        export_dir (str): Root directory of the parquet dataset.
+        batch_size (int): Number of rows fetched from the DB per batch.
+        lag_seconds (int): Only export rows inserted at least this many seconds ago.
+
+    Returns:
+    -------
+        int: The number of rows exported.
+    """
+    os.makedirs(export_dir, exist_ok=True)
+    watermark = read_watermark(export_dir)
+
+    select_dict = {
+        "DB_PRICE_TABLE": DB_PRICE_TABLE,
+        "watermark": watermark[0].isoformat(),
+        "watermark_ev_id": watermark[1],
+        "lag_seconds": lag_seconds,
+    }
+    select_query = read_sql_file(f"{BASE_SQL_PATH}/select_evprice_since.sql", select_dict)
+
+    total_rows = 0
+    # a named cursor streams rows from the server instead of loading the whole result
+    with connection.cursor(name="export_evprice") as cursor:
+        cursor.itersize = batch_size
+        cursor.execute(select_query)
+        while rows := cursor.fetchmany(batch_size):
+            part_name = f"part-{int(watermark[0].timestamp() * 1_000_000)}-{watermark[1] or 0}.parquet"
+            write_partitions(export_dir, rows, part_name)
+            watermark = (rows[-1][-1], rows[-1][0])
+            write_watermark(export_dir, watermark)
+            total_rows += len(rows)
+    return total_rows
+
+
+def main():
+    """Export new price history rows to parquet."""
+    parser = argparse.ArgumentParser(description="Incrementally export EV price history to parquet.")
+    parser.add_argument("--export-dir", default=EXPORT_DIR, help="Root directory of the parquet dataset.")
+    parser.add_argument("--batch-size", type=int, default=100_000, help="Rows fetched from the DB per batch.")
+    parser.add_argument(
+        "--lag-seconds", type=int, default=EXPORT_LAG_SECONDS, help="Only export rows inserted this long ago."
+    )
+    parser.add_argument("--credentials", default="credentials.json", help="Service account credentials file.")
+    args = parser.parse_args()
+
+    connection = psycopg2.connect(
+        host=DB_HOSTNAME,
+        user=DB_USERNAME,
+        password=get_secret_payload(args.credentials),
+        dbname=DB_DATABASE,
+        port=DB_PORT,
+    )
+    try:
+        total_rows = export_price_history(connection, args.export_dir, args.batch_size, args.lag_seconds)
+    finally:
+        connection.close()
+    print(f"Exported {total_rows} rows to {args.export_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+import argparse
+import os
+import socket
+import sqlite3
+import tempfile
+import time
+from multiprocessing import Process
+
+from scrapy.crawler import CrawlerProcess
+from scrapy.utils.project import get_project_settings
+
+from loadtest.server import add_site_arguments, serve, site_kwargs, synthetic_models
+from scraper.spiders.lucid import LucidSpider
+from scraper.spiders.rivian import RivianSpider
+from scraper.spiders.tesla import TeslaSpider
+from scraper.storage import DB_PRICE_TABLE
+
+SPIDERS = {
+    "tesla": TeslaSpider,
+    "rivian": RivianSpider,
+    "lucid": LucidSpider,
+}
+
+
+def wait_for_port(port: int, timeout: float = 30.0):
+    """
+    Wait until the mock site accepts connections.
+
+    Args:
+    ----
+        port (int): The port of the mock site.
+        timeout (float): Seconds to wait before giving up.
+
+    Raises:
+    ------
+        TimeoutError: If the port is still closed after the timeout.
+    """
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=1):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise TimeoutError(f"Mock site is not listening on port {port}")
+
+
+def count_rows(path: str, table: str):
+    """Count the rows of a table in the SQLite file, or 0 if it does not exist."""
+    connection = sqlite3.connect(path)
+    try:
+        return connection.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    except sqlite3.OperationalError:
+        return 0
+    finally:
+        connection.close()
+
+
+def run_crawl(args: argparse.Namespace, work_dir: str):
+    """
+    Crawl the mock site with every selected spider, writing to an SQLite price table.
+
+    Args:
+    ----
+        args (argparse.Namespace): The parsed options.
+        work_dir (str): Directory of the price table, spool, image cache and checkpoint.
+
+    Returns:
+    -------
+        tuple[dict[str, dict], float, int, int]: The stats of each spider, the wall time in seconds, and the rows
+        inserted into the price and quarantine tables.
+    """
+    db_path = os.path.join(work_dir, "ev_price.sqlite3")
+    settings = get_project_settings()
+    settings.setdict(
+        {
+            "LOG_LEVEL": args.log_level,
+            "LOG_ENABLED": True,
+            "CONCURRENT_REQUESTS": args.concurrency,
+            "CONCURRENT_REQUESTS_PER_DOMAIN": args.concurrency,
+            "STORAGE_BACKEND": "sqlite",
+            "STORAGE_SQLITE_PATH": db_path,
+            "SPOOL_DIR": os.path.join(work_dir, "spool"),
+            "SPOOL_BATCH_SIZE": args.spool_batch_size,
+            "IMAGE_CACHE_STORE": os.path.join(work_dir, "images"),
+            "CHECKPOINT_ENABLED": args.checkpoint,
+            "CHECKPOINT_PATH": os.path.join(work_dir, "checkpoint.sqlite3"),
+            "PRICE_EVENT_SINK": None,
+        }
+    )
+
+    rows_before = count_rows(db_path, DB_PRICE_TABLE)
+    quarantined_before = count_rows(db_path, f"{DB_PRICE_TABLE}_quarantine")
+
+    process = CrawlerProcess(settings)
+    crawlers = {}
+    for brand_name in args.brands:
+        crawler = process.create_crawler(SPIDERS[brand_name])
+        base_url = f"http://127.0.0.1:{args.port}/{brand_name}"
+        process.crawl(crawler, base_url=base_url, model_list=synthetic_models(brand_name, args.models))
+        crawlers[brand_name] = crawler
+
+    start = time.monotonic()
+    process.start()
+    elapsed = time.monotonic() - start
+
+    stats = {brand_name: crawler.stats.get_stats() for brand_name, crawler in crawlers.items()}
+    inserted = count_rows(db_path, DB_PRICE_TABLE) - rows_before
+    quarantined = count_rows(db_path, f"{DB_PRICE_TABLE}_quarantine") - quarantined_before
+    return stats, elapsed, inserted, quarantined
+
+
+def print_report(stats: dict[str, dict], elapsed: float, inserted: int, quarantined: int):
+    """Print the throughput of each spider and of the whole crawl."""
+    print(f"{'spider':<8} {'requests':>9} {'2xx':>7} {'errors':>7} {'retries':>8} {'items':>7} {'seconds':>8}")
+    total_requests = total_items = 0
+    for brand_name, spider_stats in stats.items():
+        requests = spider_stats.get("downloader/request_count", 0)
+        ok = sum(v for k, v in spider_stats.items() if k.startswith("downloader/response_status_count/2"))
+        errors = sum(
+            v
+            for k, v in spider_stats.items()
+            if k.startswith("downloader/response_status_count/5") or k == "downloader/exception_count"
+        )
+        items = spider_stats.get("item_scraped_count", 0)
+        total_requests += requests
+        total_items += items
+        print(
+            f"{brand_name:<8} {requests:>9} {ok:>7} {errors:>7} {spider_stats.get('retry/count', 0):>8} {items:>7} "
+            f"{spider_stats.get('elapsed_time_seconds', 0):>8.1f}"
+        )
+    print(
+        f"\n{total_requests} requests, {total_items} items, {inserted} rows inserted and {quarantined} quarantined "
+        f"in {elapsed:.1f}s"
+    )
+    print(
+        f"{total_requests / elapsed:.1f} requests/s, {total_items / elapsed:.1f} items/s, "
+        f"{(inserted + quarantined) / elapsed:.1f} DB rows/s"
+    )
+
+
+def main():
+    """Crawl a local mock manufacturer site and report end-to-end throughput."""
+    parser = argparse.ArgumentParser(description="Load test the spiders against a local mock manufacturer site.")
+    add_site_arguments(parser)
+    parser.add_argument("--brands", nargs="+", choices=list(SPIDERS), default=list(SPIDERS), help="Spiders to run.")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent requests of each spider.")
+    parser.add_argument("--spool-batch-size", type=int, default=500, help="Items inserted per DB transaction.")
+    parser.add_argument("--checkpoint", action="store_true", help="Enable crawl checkpointing.")
+    parser.add_argument("--work-dir", default=None, help="Directory of the SQLite DB, spool and image cache.")
+    parser.add_argument("--log-level", default="ERROR", help="Scrapy log level.")
+    args = parser.parse_args()
+
+    work_dir = args.work_dir or tempfile.mkdtemp(prefix="ev_price_loadtest_")
+    os.makedirs(work_dir, exist_ok=True)
+
+    # the site runs in its own process, so its threads do not compete with the crawl for the GIL
+    site = Process(target=serve, kwargs=site_kwargs(args), daemon=True)
+    site.start()
+    try:
+        wait_for_port(args.port)
+        stats, elapsed, inserted, quarantined = run_crawl(args, work_dir)
+    finally:
+        site.terminate()
+        site.join()
+    print_report(stats, elapsed, inserted, quarantined)
+    print(f"Work directory: {work_dir}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+import argparse
+import hashlib
+import random
+import threading
+import time
+from email.utils import formatdate
+from http import HTTPStatus
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import BytesIO
+from urllib.parse import unquote, urlparse
+
+MOCK_PORT = 8765
+
+# Real model names of each brand, numbered to generate as many synthetic models as needed
+BRAND_MODELS = {
+    "tesla": [("model s", "sedan"), ("model 3", "sedan"), ("model x", "suv"), ("model y", "suv")],
+    "rivian": [("r1s", "suv"), ("r1t", "truck")],
+    "lucid": [("air pure", "sedan"), ("air touring", "sedan"), ("air grand touring", "sedan")],
+}
+BRAND_PRICE_RANGE = {
+    "tesla": (38_000, 110_000),
+    "rivian": (70_000, 100_000),
+    "lucid": (69_000, 140_000),
+}
+
+ROBOTS_TXT = b"User-agent: *\nAllow: /\n"
+
+
+def synthetic_models(brand_name: str, count: int):
+    """
+    Generate a brand's synthetic models, named after its real models.
+
+    Args:
+    ----
+        brand_name (str): The brand name.
+        count (int): Number of models to generate.
+
+    Returns:
+    -------
+        list[tuple[str, str]]: The (model name, car type) of each model, as the brand's spider expects them.
+    """
+    models = BRAND_MODELS[brand_name]
+    # rivian model names end up in image URLs, so they cannot contain spaces
+    separator = "-" if brand_name == "rivian" else " "
+    return [(f"{models[i % len(models)][0]}{separator}{i}", models[i % len(models)][1]) for i in range(count)]
+
+
+def model_slug(brand_name: str, model_name: str):
+    """Get the URL path of a model, as the brand's spider builds it."""
+    if brand_name == "lucid":
+        return model_name.replace(" ", "-")
+    return model_name.replace(" ", "")
+
+
+class MockSite:
+
+    """Synthetic manufacturer pages with the structure each spider parses, and prices that churn over time."""
+
+    def __init__(self, models_per_brand: int = 1000, page_bytes: int = 50_000, seed: int = 0):
+        """
+        Attributes
+        ----------
+            page_bytes (int): Approximate size of each model page, padded with filler markup
+            models (dict[tuple[str, str], str]): Model name by (brand name, URL path)
+            prices (dict[tuple[str, str], int]): Current msrp by (brand name, URL path)
+            images (dict[str, tuple[bytes, str]]): Generated JPEG and its ETag by image name
+            started (str): Last-Modified of every image, the time the site started
+        """
+        self.page_bytes = page_bytes
+        self.random = random.Random(seed)
+        self.models = {}
+        self.prices = {}
+        for brand_name, (low, high) in BRAND_PRICE_RANGE.items():
+            for model_name, _ in synthetic_models(brand_name, models_per_brand):
+                key = (brand_name, model_slug(brand_name, model_name))
+                self.models[key] = model_name
+                self.prices[key] = self.random.randrange(low, high, 100)
+        self.images = {}
+        self.images_lock = threading.Lock()
+        self.started = formatdate(time.time(), usegmt=True)
+
+    def churn(self, rate: float, max_change: float):
+        """
+        Change the price of a random share of models.
+
+        Args:
+        ----
+            rate (float): Share of models whose price changes.
+            max_change (float): Largest relative change of a price.
+        """
+        for key, price in self.prices.items():
+            if self.random.random() < rate:
+                change = self.random.uniform(-max_change, max_change)
+                self.prices[key] = int(round(price * (1 + change), -2))
+
+    def filler(self, length: int):
+        """Get markup of about `length` bytes that no spider selects, standing in for the rest of a real page."""
+        block = '<div class="tds-layout-item"><span>Explore features, range and charging.</span></div>\n'
+        return block * max(length // len(block), 0)
+
+    def render_page(self, brand_name: str, slug: str, host: str):
+        """
+        Render a model page with the markup its brand's spider extracts the msrp and image from.
+
+        Args:
+        ----
+            brand_name (str): The brand name.
+            slug (str): The model's URL path.
+            host (str): The Host header, for absolute image URLs.
+
+        Returns:
+        -------
+            bytes or None: The HTML page, or None if there is no such model.
+        """
+        model_name = self.models.get((brand_name, slug))
+        if model_name is None:
+            return None
+        price = self.prices[(brand_name, slug)]
+        title = model_name.title()
+        base_url = f"http://{host}/{brand_name}"
+
+        if brand_name == "tesla":
+            body = (
+                f"<h1>{title}</h1>\n"
+                f'<picture data-alt="{title} Exterior" data-iesrc="{base_url}/images/{slug}-order.jpg">'
+                f'<img src="{base_url}/images/{slug}-order.jpg"></picture>\n'
+                f'<p class="tds-text--caption Disclaimer">Starting at ${price:,} before est. savings</p>\n'
+                '<p class="disclaimer">Prices shown exclude taxes and fees.</p>\n'
+            )
+        elif brand_name == "rivian":
+            body = (
+                f"<h1>{title}</h1>\n"
+                f'<img src="{base_url}/images/f_auto,q_auto/{model_name.upper()}.jpg">\n'
+                f'<div data-section-gtm="{title} Starting Price"><h5>Starting price</h5><h5>${price:,}</h5></div>\n'
+            )
+        else:
+            trim = model_name.replace("air ", "").title()
+            body = (
+                f"<h1>{title}. Buy from ${price:,}</h1>\n"
+                f'<h1>Lease from ${price // 100:,}/mo</h1>\n<img alt="{trim}" src="/images/{slug}.jpg">\n'
+            )
+
+        page = f"<!DOCTYPE html>\n<html><head><title>{title}</title></head><body>\n{body}"
+        page += self.filler(self.page_bytes - len(page)) + "</body></html>\n"
+        return page.encode("utf-8")
+
+    def image(self, name: str):
+        """
+        Get an image, generating a small JPEG of a color derived from its name the first time.
+
+        Args:
+        ----
+            name (str): The image name.
+
+        Returns:
+        -------
+            tuple[bytes, str]: The JPEG and its ETag.
+        """
+        with self.images_lock:
+            if name not in self.images:
+                from PIL import Image
+
+                color = tuple(hashlib.md5(name.encode("utf-8")).digest()[:3])
+                buffer = BytesIO()
+                Image.new("RGB", (320, 180), color).save(buffer, "JPEG")
+                body = buffer.getvalue()
+                self.images[name] = (body, f'"{hashlib.sha256(body).hexdigest()}"')
+            return self.images[name]
+
+
+class MockSiteRequestHandler(BaseHTTPRequestHandler):
+
+    """Serve the mock site with injected latency and errors."""
+
+    protocol_version = "HTTP/1.1"
+    site: MockSite = None
+    latency = 0.0
+    jitter = 0.0
+    error_rate = 0.0
+
+    def do_GET(self):
+        """Handle a GET request."""
+        path = urlparse(self.path).path
+        if path == "/robots.txt":
+            self.send_body(ROBOTS_TXT, "text/plain")
+            return
+
+        time.sleep(max(random.gauss(self.latency, self.jitter), 0))
+        if random.random() < self.error_rate:
+            self.send_error(HTTPStatus.SERVICE_UNAVAILABLE)
+            return
+
+        parts = [unquote(part) for part in path.strip("/").split("/")]
+        if len(parts) >= 3 and parts[0] in BRAND_MODELS and parts[1] == "images":
+            body, etag = self.site.image("/".join(parts))
+            if self.headers.get("If-None-Match") == etag:
+                self.send_response(HTTPStatus.NOT_MODIFIED)
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_body(body, "image/jpeg", {"ETag": etag, "Last-Modified": self.site.started})
+            return
+
+        page = None
+        if len(parts) == 2:
+            page = self.site.render_page(parts[0], parts[1], self.headers.get("Host", f"127.0.0.1:{MOCK_PORT}"))
+        if page is None:
+            self.send_error(HTTPStatus.NOT_FOUND)
+            return
+        self.send_body(page, "text/html; charset=utf-8")
+
+    def send_body(self, body: bytes, content_type: str, headers: dict | None = None):
+        """Send a 200 response."""
+        self.send_response(HTTPStatus.OK)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        """Do not log every request."""
+
+
+class MockSiteServer(ThreadingHTTPServer):
+
+    """Threaded server with a listen backlog deep enough for a crawl's concurrent connections."""
+
+    daemon_threads = True
+    request_queue_size = 256
+
+
+def serve(
+    port: int = MOCK_PORT,
+    models_per_brand: int = 1000,
+    page_bytes: int = 50_000,
+    latency: float = 0.0,
+    jitter: float = 0.0,
+    error_rate: float = 0.0,
+    churn_rate: float = 0.0,
+    churn_max_change: float = 0.05,
+    churn_interval: float = 0.0,
+    seed: int = 0,
+):
+    """
+    Serve the mock site forever.
+
+    Args:
+    ----
+        port (int): The port to listen on.
+        models_per_brand (int): Number of synthetic models of each brand.
+        page_bytes (int): Approximate size of each model page.
+        latency (float): Mean delay of each response, in seconds.
+        jitter (float): Standard deviation of the delay, in seconds.
+        error_rate (float): Share of requests answered with 503 Service Unavailable.
+        churn_rate (float): Share of models whose price changes every churn interval.
+        churn_max_change (float): Largest relative change of a churned price.
+        churn_interval (float): Seconds between price changes, or 0 for fixed prices.
+        seed (int): Seed of the generated prices.
+    """
+    site = MockSite(models_per_brand, page_bytes, seed)
+    MockSiteRequestHandler.site = site
+    MockSiteRequestHandler.latency = latency
+    MockSiteRequestHandler.jitter = jitter
+    MockSiteRequestHandler.error_rate = error_rate
+
+    if churn_interval > 0 and churn_rate > 0:
+
+        def churn():
+            while True:
+                time.sleep(churn_interval)
+                site.churn(churn_rate, churn_max_change)
+
+        threading.Thread(target=churn, daemon=True).start()
+
+    server = MockSiteServer(("127.0.0.1", port), MockSiteRequestHandler)
+    print(f"Serving {len(site.models)} mock model pages on port {port}")
+    server.serve_forever()
+
+
+def add_site_arguments(parser: argparse.ArgumentParser):
+    """Add the options of the mock site to a parser."""
+    parser.add_argument("--port", type=int, default=MOCK_PORT, help="Port of the mock site.")
+    parser.add_argument("--models", type=int, default=1000, help="Synthetic models per brand.")
+    parser.add_argument("--page-bytes", type=int, default=50_000, help="Approximate size of each model page.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mean response delay in seconds.")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Standard deviation of the response delay.")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with a 503.")
+    parser.add_argument("--churn-rate", type=float, default=0.0, help="Share of prices changed every interval.")
+    parser.add_argument("--churn-max-change", type=float, default=0.05, help="Largest relative price change.")
+    parser.add_argument("--churn-interval", type=float, default=0.0, help="Seconds between price changes.")
+    parser.add_argument("--seed", type=int, default=0, help="Seed of the generated prices.")
+
+
+def site_kwargs(args: argparse.Namespace):
+    """Get the keyword arguments of `serve` from parsed site options."""
+    return {
+        "port": args.port,
+        "models_per_brand": args.models,
+        "page_bytes": args.page_bytes,
+        "latency": args.latency,
+        "jitter": args.jitter,
+        "error_rate": args.error_rate,
+        "churn_rate": args.churn_rate,
+        "churn_max_change": args.churn_max_change,
+        "churn_interval": args.churn_interval,
+        "seed": args.seed,
+    }
+
+
+def main():
+    """Serve the mock manufacturer site."""
+    parser = argparse.ArgumentParser(description="Serve synthetic Tesla, Rivian and Lucid model pages.")
+    add_site_arguments(parser)
+    serve(**site_kwargs(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
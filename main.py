@@ -1,11 +1,7 @@
 from multiprocessing import Process, Queue
 
-from scrapy.crawler import CrawlerProcess
-from scrapy.utils.project import get_project_settings
-
-from scraper.spiders.lucid import LucidSpider
-from scraper.spiders.rivian import RivianSpider
-from scraper.spiders.tesla import TeslaSpider
+# Scrapy, the spiders and the pipelines' dependencies are only imported inside the child process, keeping them off
+# the Cloud Function's cold start
 
 
 def run_ev_price_spider(event, context):
@@ -13,6 +9,13 @@ def run_ev_price_spider(event, context):
 
     def script(queue):
         try:
+            from scrapy.crawler import CrawlerProcess
+            from scrapy.utils.project import get_project_settings
+
+            from scraper.spiders.lucid import LucidSpider
+            from scraper.spiders.rivian import RivianSpider
+            from scraper.spiders.tesla import TeslaSpider
+
             settings = get_project_settings()
 
             settings.setdict(
@@ -0,0 +1,127 @@
+import json
+import os
+import sqlite3
+from datetime import datetime, timezone
+
+
+def current_run_id():
+    """Get the id of the current run; every trigger on the same UTC day resumes the same run."""
+    return datetime.now(timezone.utc).date().isoformat()
+
+
+class CrawlCheckpoint:
+
+    """Request frontier and committed items of the current run, in a SQLite file."""
+
+    def __init__(self, path: str, run_id: str | None = None):
+        """
+        Attributes
+        ----------
+            path (str): Path of the SQLite file, created if missing
+            run_id (str): Id of the current run; rows of earlier runs are deleted
+        """
+        self.path = path
+        self.run_id = run_id or current_run_id()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        # written by the crawl but closed when the engine stops
+        self.connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute("PRAGMA synchronous=NORMAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS frontier (run_id TEXT, spider TEXT, fingerprint TEXT, url TEXT, callback TEXT, "
+            "meta TEXT, done INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (run_id, spider, fingerprint))"
+        )
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS committed (run_id TEXT, brand_name TEXT, model_name TEXT, locale TEXT, "
+            "PRIMARY KEY (run_id, brand_name, model_name, locale))"
+        )
+        self.connection.execute("DELETE FROM frontier WHERE run_id != ?", (self.run_id,))
+        self.connection.execute("DELETE FROM committed WHERE run_id != ?", (self.run_id,))
+        self.connection.commit()
+
+    def add_request(self, spider: str, fingerprint: str, url: str, callback: str | None, meta: dict):
+        """
+        Record a request in the frontier, unless already recorded.
+
+        Args:
+        ----
+            spider (str): Name of the spider.
+            fingerprint (str): The request fingerprint.
+            url (str): The request URL.
+            callback (str | None): Name of the spider method handling the response, or None for `parse`.
+            meta (dict): The request meta set by the spider.
+        """
+        self.connection.execute(
+            "INSERT OR IGNORE INTO frontier (run_id, spider, fingerprint, url, callback, meta) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.run_id, spider, fingerprint, url, callback, json.dumps(meta, default=str)),
+        )
+        self.connection.commit()
+
+    def finish_request(self, spider: str, fingerprint: str):
+        """
+        Mark a request whose response was fully processed.
+
+        Args:
+        ----
+            spider (str): Name of the spider.
+            fingerprint (str): The request fingerprint.
+        """
+        self.connection.execute(
+            "UPDATE frontier SET done = 1 WHERE run_id = ? AND spider = ? AND fingerprint = ?",
+            (self.run_id, spider, fingerprint),
+        )
+        self.connection.commit()
+
+    def is_request_done(self, spider: str, fingerprint: str):
+        """Check whether a request was fully processed in the current run."""
+        row = self.connection.execute(
+            "SELECT done FROM frontier WHERE run_id = ? AND spider = ? AND fingerprint = ?",
+            (self.run_id, spider, fingerprint),
+        ).fetchone()
+        return bool(row and row[0])
+
+    def pending_requests(self, spider: str):
+        """
+        Get the requests recorded but not fully processed in the current run.
+
+        Args:
+        ----
+            spider (str): Name of the spider.
+
+        Returns:
+        -------
+            list[tuple[str, str, str | None, dict]]: The fingerprint, URL, callback name and meta of each request.
+        """
+        rows = self.connection.execute(
+            "SELECT fingerprint, url, callback, meta FROM frontier WHERE run_id = ? AND spider = ? AND done = 0",
+            (self.run_id, spider),
+        )
+        return [(fingerprint, url, callback, json.loads(meta)) for fingerprint, url, callback, meta in rows]
+
+    def commit_item(self, brand_name: str, model_name: str, locale: str):
+        """
+        Mark an item as durably committed in the current run.
+
+        Args:
+        ----
+            brand_name (str): The brand name.
+            model_name (str): The model name.
+            locale (str): The locale the item was scraped for.
+        """
+        self.connection.execute(
+            "INSERT OR IGNORE INTO committed (run_id, brand_name, model_name, locale) VALUES (?, ?, ?, ?)",
+            (self.run_id, brand_name, model_name, locale),
+        )
+        self.connection.commit()
+
+    def is_item_committed(self, brand_name: str, model_name: str, locale: str):
+        """Check whether an item was committed in the current run."""
+        row = self.connection.execute(
+            "SELECT 1 FROM committed WHERE run_id = ? AND brand_name = ? AND model_name = ? AND locale = ?",
+            (self.run_id, brand_name, model_name, locale),
+        ).fetchone()
+        return row is not None
+
+    def close(self):
+        """Close the SQLite file."""
+        self.connection.close()
@@ -0,0 +1,137 @@
+import json
+import os
+import stat
+import tempfile
+import time
+
+from dotenv import load_dotenv
+
+################################
+# Set Up Environment Variables #
+################################
+
+# Using .env, load GCP variables
+load_dotenv()
+GCP_PROJECT_ID = os.getenv("GCP_PROJECT_ID")
+GCP_SECRET_2_ID = os.getenv("GCP_SECRET_2_ID")
+GCP_VERSION_ID = os.getenv("GCP_VERSION_ID")
+
+# Using GCF & SM, access secret through mounting as volume
+secret_location = "/postgres/secret"
+
+# Elsewhere, access secret through the Secret Manager API and cache it locally, in a directory only this user can access
+SECRET_CACHE_DIR = os.path.join(os.getenv("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "ev_price")
+SECRET_CACHE_PATH = os.path.join(SECRET_CACHE_DIR, "secret")
+SECRET_CACHE_TTL = 3600
+
+_secret_cache = {}
+
+
+def access_secret_manager(credentials_path: str = "credentials.json"):
+    """
+    Access the DB password from Secret Manager.
+
+    Args:
+    ----
+        credentials_path (str): Path to the service account credentials file.
+
+    Returns:
+    -------
+        str: The DB password.
+    """
+    from google.cloud import secretmanager
+    from google.oauth2 import service_account
+
+    with open(credentials_path, "r") as f:
+        credentials = service_account.Credentials.from_service_account_info(json.load(f))
+    client = secretmanager.SecretManagerServiceClient(credentials=credentials)
+    name = f"projects/{GCP_PROJECT_ID}/secrets/{GCP_SECRET_2_ID}/versions/{GCP_VERSION_ID}"
+    response = client.access_secret_version(name=name)
+    return response.payload.data.decode("UTF-8")
+
+
+def read_secret_cache(path: str, ttl: float):
+    """
+    Read the cached DB password, trusting the file only if this user owns it and nobody else can access it.
+
+    Args:
+    ----
+        path (str): Path of the cache file.
+        ttl (float): Seconds a cached payload stays valid.
+
+    Returns:
+    -------
+        str or None: The DB password, or None if the cache is missing, stale or not trusted.
+    """
+    try:
+        # never follow a symlink planted in place of the cache file
+        fd = os.open(path, os.O_RDONLY | os.O_NOFOLLOW)
+    except OSError:
+        return None
+    with os.fdopen(fd, "r") as f:
+        file_stat = os.fstat(f.fileno())
+        if (
+            not stat.S_ISREG(file_stat.st_mode)
+            or file_stat.st_uid != os.getuid()
+            or file_stat.st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+            or file_stat.st_mtime + ttl <= time.time()
+        ):
+            return None
+        return f.read()
+
+
+def write_secret_cache(path: str, payload: str):
+    """
+    Atomically cache the DB password in an owner-only file, skipping the cache if its directory is not trusted.
+
+    Args:
+    ----
+        path (str): Path of the cache file.
+        payload (str): The DB password.
+    """
+    cache_dir = os.path.dirname(path)
+    os.makedirs(cache_dir, mode=0o700, exist_ok=True)
+    dir_stat = os.lstat(cache_dir)
+    if not stat.S_ISDIR(dir_stat.st_mode) or dir_stat.st_uid != os.getuid() or dir_stat.st_mode & 0o077:
+        return
+    # mkstemp creates the file with O_EXCL and mode 0600, so it cannot be pre-created by anyone else
+    fd, tmp_path = tempfile.mkstemp(dir=cache_dir)
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+def get_secret_payload(credentials_path: str = "credentials.json", ttl: float = SECRET_CACHE_TTL):
+    """
+    Get the DB password, only calling Secret Manager when no cached copy is fresh.
+
+    The mounted secret is preferred when present. Otherwise the payload is cached in memory and in an owner-only
+    file under the user's cache directory, both for ttl seconds.
+
+    Args:
+    ----
+        credentials_path (str): Path to the service account credentials file.
+        ttl (float): Seconds a cached payload stays valid.
+
+    Returns:
+    -------
+        str: The DB password.
+    """
+    if _secret_cache and _secret_cache["expires_at"] > time.time():
+        return _secret_cache["payload"]
+
+    if os.path.exists(secret_location):
+        with open(secret_location) as f:
+            payload = f.readlines()[0]
+    else:
+        payload = read_secret_cache(SECRET_CACHE_PATH, ttl)
+        if payload is None:
+            payload = access_secret_manager(credentials_path)
+            write_secret_cache(SECRET_CACHE_PATH, payload)
+
+    _secret_cache.update(payload=payload, expires_at=time.time() + ttl)
+    return payload
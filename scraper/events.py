@@ -0,0 +1,255 @@
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import urllib.request
+
+logger = logging.getLogger(__name__)
+
+
+def build_price_change_event(item: dict, old_msrp: float):
+    """
+    Build a price-change event for an item whose msrp changed.
+
+    Args:
+    ----
+        item (dict): The inserted item.
+        old_msrp (float): The previous msrp of the model.
+
+    Returns:
+    -------
+        dict: The JSON-serializable event.
+    """
+    new_msrp = float(item["msrp"])
+    return {
+        "event_type": "price_change",
+        "ev_id": item["ev_id"],
+        "brand_name": item["brand_name"],
+        "model_name": item["model_name"],
+        "car_type": item["car_type"],
+        "model_url": item["model_url"],
+        "old_msrp": old_msrp,
+        "new_msrp": new_msrp,
+        "delta": new_msrp - old_msrp,
+        "create_timestamp": item["create_timestamp"].isoformat(),
+    }
+
+
+####################
+# Initialize Sinks #
+####################
+
+
+class JsonlSink:
+
+    """Append events to a local JSON Lines file."""
+
+    def __init__(self, path: str):
+        """
+        Attributes
+        ----------
+            path (str): Path of the JSON Lines file
+        """
+        self.path = path
+
+    def send(self, events: list[dict]):
+        """Append a batch of events, one per line, without interleaving with other writers of the file."""
+        data = "".join(json.dumps(event) + "\n" for event in events).encode("utf-8")
+        # a single O_APPEND write lands whole at the end of the file, while a buffered file flushes in pieces
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, data)
+        finally:
+            os.close(fd)
+
+
+class WebhookSink:
+
+    """POST batches of events to a webhook as a JSON array."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        """
+        Attributes
+        ----------
+            url (str): The webhook URL
+            timeout (float): Seconds to wait for the webhook to respond
+        """
+        self.url = url
+        self.timeout = timeout
+
+    def send(self, events: list[dict]):
+        """POST a batch of events; raises on a non-2xx response."""
+        request = urllib.request.Request(
+            self.url,
+            data=json.dumps(events).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST",
+        )
+        with urllib.request.urlopen(request, timeout=self.timeout):
+            pass
+
+
+class PubSubSink:
+
+    """Publish events to a Google Cloud Pub/Sub topic."""
+
+    def __init__(self, topic_path: str):
+        """
+        Attributes
+        ----------
+            topic_path (str): The topic, as `projects/<project_id>/topics/<topic_id>`
+        """
+        from google.cloud import pubsub_v1
+
+        self.topic_path = topic_path
+        self.publisher = pubsub_v1.PublisherClient()
+
+    def send(self, events: list[dict]):
+        """Publish a batch of events and wait until every one is accepted."""
+        futures = [self.publisher.publish(self.topic_path, json.dumps(event).encode("utf-8")) for event in events]
+        for future in futures:
+            future.result()
+
+
+class LocalQueueSink:
+
+    """In-process stand-in for a message queue, for local runs and tests."""
+
+    def __init__(self):
+        """
+        Attributes
+        ----------
+            queue (queue.Queue): Delivered events, in order
+        """
+        self.queue = queue.Queue()
+
+    def send(self, events: list[dict]):
+        """Put a batch of events on the queue."""
+        for event in events:
+            self.queue.put(event)
+
+
+def build_sink(settings):
+    """
+    Build the event sink chosen by the PRICE_EVENT_SINK setting.
+
+    Args:
+    ----
+        settings (scrapy.settings.Settings): The crawler settings.
+
+    Returns:
+    -------
+        object or None: A sink with a `send(events)` method, or None if events are disabled.
+    """
+    sink_name = settings.get("PRICE_EVENT_SINK")
+    if not sink_name:
+        return None
+    if sink_name == "jsonl":
+        return JsonlSink(settings.get("PRICE_EVENT_JSONL_PATH"))
+    if sink_name == "webhook":
+        return WebhookSink(settings.get("PRICE_EVENT_WEBHOOK_URL"))
+    if sink_name == "pubsub":
+        return PubSubSink(settings.get("PRICE_EVENT_PUBSUB_TOPIC"))
+    if sink_name == "local":
+        return LocalQueueSink()
+    raise ValueError(f"Unknown PRICE_EVENT_SINK: {sink_name}")
+
+
+#########################
+# Initialize Dispatcher #
+#########################
+
+
+class EventDispatcher:
+
+    """Deliver events to a sink in batches from a background thread."""
+
+    _STOP = object()
+
+    def __init__(
+        self,
+        sink,
+        batch_size: int = 100,
+        flush_interval: float = 5.0,
+        max_retries: int = 3,
+        retry_backoff: float = 1.0,
+        max_queue_size: int = 10_000,
+    ):
+        """
+        Attributes
+        ----------
+            sink (object): Destination with a `send(events)` method
+            batch_size (int): Maximum number of events per delivery
+            flush_interval (float): Maximum seconds an event waits before its batch is delivered
+            max_retries (int): Number of retries for a failed delivery before the batch is dropped
+            retry_backoff (float): Seconds before the first retry, doubled for each following retry
+            max_queue_size (int): Number of undelivered events held before new events are dropped
+        """
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+        self._queue = queue.Queue(maxsize=max_queue_size)
+        self._thread = threading.Thread(target=self._run, name="event-dispatcher", daemon=True)
+
+    def start(self):
+        """Start delivering events."""
+        self._thread.start()
+
+    def emit(self, event: dict):
+        """
+        Queue an event for delivery without blocking.
+
+        Args:
+        ----
+            event (dict): The JSON-serializable event.
+        """
+        try:
+            self._queue.put_nowait(event)
+        except queue.Full:
+            logger.warning("Event queue is full, dropping event for %s", event.get("model_name"))
+
+    def stop(self, timeout: float | None = None):
+        """
+        Deliver the queued events and stop.
+
+        Args:
+        ----
+            timeout (float | None): Maximum seconds to wait for delivery.
+        """
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join(timeout)
+
+    def _run(self):
+        """Collect events into batches and deliver them until stopped."""
+        stopping = False
+        while not stopping:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    event = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if event is self._STOP:
+                    stopping = True
+                    break
+                batch.append(event)
+            if batch:
+                self._deliver(batch)
+
+    def _deliver(self, batch: list[dict]):
+        """Send a batch to the sink, retrying with exponential backoff."""
+        for attempt in range(self.max_retries + 1):
+            try:
+                self.sink.send(batch)
+                return
+            except Exception as e:
+                if attempt == self.max_retries:
+                    logger.error("Dropping %d events after %d attempts: %s", len(batch), attempt + 1, e)
+                    return
+                time.sleep(self.retry_backoff * 2**attempt)
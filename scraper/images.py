@@ -0,0 +1,159 @@
+import hashlib
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+
+class ImageStore:
+
+    """Content-addressed image files, their thumbnails and the validators of each fetched URL."""
+
+    def __init__(self, root: str, thumbs: dict[str, tuple[int, int]] | None = None):
+        """
+        Attributes
+        ----------
+            root (str): Directory holding the images, thumbnails and URL index
+            thumbs (dict[str, tuple[int, int]]): Maximum (width, height) of each thumbnail, by name
+            connection (sqlite3.Connection): Index of the key, ETag and Last-Modified of each fetched URL
+            lock (threading.Lock): Serializes use of the index, which is shared by the reactor's worker threads
+            persist_locks (list[threading.Lock]): Locks striped by image key, so an image is only stored once at a time
+        """
+        self.root = root
+        self.thumbs = thumbs or {}
+        os.makedirs(root, exist_ok=True)
+        self.connection = sqlite3.connect(os.path.join(root, "index.sqlite3"), check_same_thread=False)
+        self.lock = threading.Lock()
+        self.persist_locks = [threading.Lock() for _ in range(16)]
+        self.connection.execute("PRAGMA journal_mode=WAL")
+        self.connection.execute(
+            "CREATE TABLE IF NOT EXISTS image_url "
+            "(url TEXT PRIMARY KEY, image_key TEXT NOT NULL, etag TEXT, last_modified TEXT)"
+        )
+        self.connection.commit()
+
+    def path(self, image_key: str, thumb_name: str | None = None):
+        """
+        Get the file path of an image or one of its thumbnails.
+
+        Args:
+        ----
+            image_key (str): SHA-256 hex digest of the image content.
+            thumb_name (str | None): Name of the thumbnail, or None for the full image.
+
+        Returns:
+        -------
+            str: The file path.
+        """
+        if thumb_name:
+            return os.path.join(self.root, "thumbs", thumb_name, image_key[:2], f"{image_key}.jpg")
+        return os.path.join(self.root, "full", image_key[:2], image_key)
+
+    def lookup(self, url: str):
+        """
+        Get the stored key and validators of a URL.
+
+        Args:
+        ----
+            url (str): The image URL.
+
+        Returns:
+        -------
+            tuple[str, str | None, str | None] or None: The image key, ETag and Last-Modified, or None if never fetched.
+        """
+        query = "SELECT image_key, etag, last_modified FROM image_url WHERE url = ?"
+        with self.lock:
+            return self.connection.execute(query, (url,)).fetchone()
+
+    def record(self, url: str, image_key: str, etag: str | None, last_modified: str | None):
+        """
+        Remember the key and validators of a fetched URL.
+
+        Args:
+        ----
+            url (str): The image URL.
+            image_key (str): SHA-256 hex digest of the image content.
+            etag (str | None): The ETag response header.
+            last_modified (str | None): The Last-Modified response header.
+        """
+        with self.lock:
+            self.connection.execute(
+                "INSERT OR REPLACE INTO image_url (url, image_key, etag, last_modified) VALUES (?, ?, ?, ?)",
+                (url, image_key, etag, last_modified),
+            )
+            self.connection.commit()
+
+    def save(self, url: str, body: bytes, etag: str | None, last_modified: str | None):
+        """
+        Store a fetched image and remember its URL's key and validators.
+
+        Args:
+        ----
+            url (str): The image URL.
+            body (bytes): The image content.
+            etag (str | None): The ETag response header.
+            last_modified (str | None): The Last-Modified response header.
+
+        Returns:
+        -------
+            str: The image key.
+        """
+        image_key = self.persist(body)
+        self.record(url, image_key, etag, last_modified)
+        return image_key
+
+    def persist(self, body: bytes):
+        """
+        Store image content under its SHA-256 key, generating thumbnails only the first time it is seen.
+
+        Args:
+        ----
+            body (bytes): The image content.
+
+        Returns:
+        -------
+            str: The image key.
+        """
+        image_key = hashlib.sha256(body).hexdigest()
+        full_path = self.path(image_key)
+        # the same image may come from several URLs at once
+        with self.persist_locks[int(image_key[0], 16)]:
+            if os.path.exists(full_path):
+                return image_key
+
+            self.make_thumbnails(image_key, body)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path))
+            with os.fdopen(fd, "wb") as f:
+                f.write(body)
+            os.replace(tmp_path, full_path)
+        return image_key
+
+    def make_thumbnails(self, image_key: str, body: bytes):
+        """
+        Write a JPEG thumbnail of the image for each configured size.
+
+        Args:
+        ----
+            image_key (str): SHA-256 hex digest of the image content.
+            body (bytes): The image content.
+        """
+        if not self.thumbs:
+            return
+        from PIL import Image
+
+        try:
+            image = Image.open(BytesIO(body)).convert("RGB")
+        except Exception as e:
+            logger.warning("Cannot make thumbnails of image %s: %s", image_key, e)
+            return
+        for thumb_name, size in self.thumbs.items():
+            thumb = image.copy()
+            thumb.thumbnail(size, Image.LANCZOS)
+            thumb_path = self.path(image_key, thumb_name)
+            os.makedirs(os.path.dirname(thumb_path), exist_ok=True)
+            thumb.save(thumb_path, "JPEG")
@@ -12,6 +12,7 @@ class EvItem(Item):
         brand_name: The brand or manufacturer name of the electric vehicle
         model_name: The model name of the electric vehicle
         image_src: The source URL of an image representing the electric vehicle
+        image_key: The SHA-256 key of the locally cached image
         msrp: The Manufacturer's Suggested Retail Price (MSRP) of the electric vehicle
         timestamp: The timestamp indicating when the data was scraped
     """
@@ -22,5 +23,6 @@ class EvItem(Item):
     model_url = Field()
     car_type = Field()
     image_src = Field()
+    image_key = Field()
     msrp = Field()
     create_timestamp = Field()
@@ -4,7 +4,11 @@
 # https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
 # useful for handling different item types with a single interface
+import scrapy
 from scrapy import signals
+from scrapy.exceptions import NotConfigured
+
+from .checkpoint import CrawlCheckpoint
 
 
 class ScraperSpiderMiddleware:
@@ -99,3 +103,106 @@ class ScraperDownloaderMiddleware:
 
     def spider_opened(self, spider):
         spider.logger.info("Spider opened: %s" % spider.name)
+
+
+class CheckpointMiddleware:
+
+    """Resume an interrupted run, skipping items already committed and requests already processed."""
+
+    def __init__(self, crawler, checkpoint: CrawlCheckpoint):
+        """
+        Attributes
+        ----------
+            crawler (scrapy.crawler.Crawler): The crawler, used for request fingerprints
+            checkpoint (CrawlCheckpoint): Frontier and committed items of the current run
+        """
+        self.crawler = crawler
+        self.checkpoint = checkpoint
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Create the middleware if CHECKPOINT_ENABLED."""
+        if not crawler.settings.getbool("CHECKPOINT_ENABLED"):
+            raise NotConfigured
+        s = cls(crawler, CrawlCheckpoint(crawler.settings.get("CHECKPOINT_PATH")))
+        crawler.signals.connect(s.spider_closed, signal=signals.spider_closed)
+        return s
+
+    def fingerprint(self, request: scrapy.Request):
+        """Get the hex fingerprint of a request."""
+        return self.crawler.request_fingerprinter.fingerprint(request).hex()
+
+    def is_done(self, request: scrapy.Request, spider: scrapy.Spider):
+        """
+        Check whether a request's work was already done in the current run.
+
+        Args:
+        ----
+            request (scrapy.Request): The request.
+            spider (scrapy.Spider): The spider that generated the request.
+
+        Returns:
+        -------
+            bool: Whether its model's item was committed or, for requests of no model, it was fully processed.
+        """
+        model_name = request.meta.get("model_name")
+        if model_name is not None:
+            locale = getattr(spider, "locale", "")
+            return self.checkpoint.is_item_committed(spider.brand_name, model_name.lower(), locale)
+        return self.checkpoint.is_request_done(spider.name, self.fingerprint(request))
+
+    def process_start_requests(self, start_requests, spider):
+        """
+        Yield the start requests not done yet, then the requests left pending by an interrupted run.
+
+        Args:
+        ----
+            start_requests (Iterable[scrapy.Request]): The spider's start requests.
+            spider (scrapy.Spider): The spider.
+
+        Returns:
+        -------
+            Iterable[scrapy.Request]: The requests with remaining work.
+        """
+        start_fingerprints = set()
+        for request in start_requests:
+            fingerprint = self.fingerprint(request)
+            start_fingerprints.add(fingerprint)
+            if self.is_done(request, spider):
+                spider.logger.debug(f"Skipping {request.url}, already done in this run.")
+                continue
+            callback = request.callback.__name__ if request.callback else None
+            self.checkpoint.add_request(spider.name, fingerprint, request.url, callback, request.meta)
+            yield request
+
+        for fingerprint, url, callback, meta in self.checkpoint.pending_requests(spider.name):
+            if fingerprint in start_fingerprints:
+                continue
+            request = scrapy.Request(url, callback=getattr(spider, callback) if callback else None, meta=meta)
+            if not self.is_done(request, spider):
+                yield request
+
+    def process_spider_output(self, response, result, spider):
+        """
+        Record the requests a response led to, then mark the response's request as processed.
+
+        Args:
+        ----
+            response (scrapy.http.Response): The response.
+            result (Iterable): The requests and items returned by the spider.
+            spider (scrapy.Spider): The spider.
+
+        Returns:
+        -------
+            Iterable: The unchanged requests and items.
+        """
+        for output in result:
+            if isinstance(output, scrapy.Request):
+                callback = output.callback.__name__ if output.callback else None
+                self.checkpoint.add_request(spider.name, self.fingerprint(output), output.url, callback, output.meta)
+            yield output
+        self.checkpoint.finish_request(spider.name, self.fingerprint(response.request))
+
+    def spider_closed(self, spider):
+        """Close the checkpoint."""
+        self.checkpoint.close()
@@ -1,45 +1,20 @@
+import asyncio
 import hashlib
 import os
-from datetime import date
+from datetime import date, datetime, timedelta, timezone
 
-import psycopg2
 import scrapy
-from dotenv import load_dotenv
 from itemadapter import ItemAdapter
 from scrapy.exceptions import DropItem
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.threads import deferToThread
 
-################################
-# Set Up Environment Variables #
-################################
-
-# Using .env, load DB variables
-load_dotenv()
-BASE_SQL_PATH = "scraper/sql"
-DB_HOSTNAME = os.getenv("DB_HOSTNAME")
-DB_USERNAME = os.getenv("DB_USERNAME")
-DB_DATABASE = os.getenv("DB_DATABASE")
-DB_PORT = os.getenv("DB_PORT")
-DB_PRICE_TABLE = os.getenv("DB_PRICE_TABLE")
-
-# Using GCF & SM, access secret through mounting as volume
-secret_location = "/postgres/secret"
-with open(secret_location) as f:
-    secret_payload = f.readlines()[0]
-
-# Establish a connection to the PostgreSQL DB
-try:
-    connection = psycopg2.connect(
-        host=DB_HOSTNAME,
-        user=DB_USERNAME,
-        password=secret_payload,
-        dbname=DB_DATABASE,
-        port=DB_PORT,
-    )
-    connection.autocommit = True
-    cursor = connection.cursor()
-except Exception as e:
-    print(f"Error connecting to the database: {e}")
-
+from .checkpoint import CrawlCheckpoint
+from .events import EventDispatcher, build_price_change_event, build_sink
+from .images import ImageStore
+from .spool import ItemError, Spool, SpoolDrainer
+from .storage import StorageBackend, build_backend
+from .validation import PriceValidator
 
 ########################
 # Initialize Pipelines #
@@ -132,30 +107,207 @@ class CleanDataPipeline:
         return item
 
 
-class InsertDataPipeline:
+class ImageCachePipeline:
+
+    """Cache item images locally under the SHA-256 of their content."""
+
+    def __init__(self, crawler, store: ImageStore):
+        """
+        Attributes
+        ----------
+            crawler (scrapy.crawler.Crawler): The crawler whose downloader fetches the images
+            store (ImageStore): Content-addressed image storage
+            fetched (dict[str, asyncio.Task]): Fetch of each URL in this run, shared by items with the same image
+        """
+        self.crawler = crawler
+        self.store = store
+        self.fetched = {}
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Create the pipeline with the image store chosen in settings."""
+        store = ImageStore(crawler.settings.get("IMAGE_CACHE_STORE"), crawler.settings.getdict("IMAGE_CACHE_THUMBS"))
+        return cls(crawler, store)
+
+    async def process_item(self, item: scrapy.Item, spider: scrapy.Spider):
+        """
+        Process an item to add the local key of its image.
+
+        Args:
+        ----
+            item (scrapy.Item): The item to be processed.
+            spider (scrapy.Spider): The spider that generated the item.
 
-    """Insert msrp data into table."""
+        Returns:
+        -------
+            scrapy.Item: The processed item with the 'image_key' field, empty if the image could not be fetched.
+        """
+        adapter = ItemAdapter(item)
+        image_src = adapter["image_src"]
+        if image_src not in self.fetched:
+            self.fetched[image_src] = asyncio.ensure_future(self.fetch_image(image_src, spider))
+        adapter["image_key"] = await self.fetched[image_src]
+        return item
 
-    def read_sql_file(self, query_file_path: str, params: dict | None = None):
-        """Read sql from file path.
+    async def fetch_image(self, url: str, spider: scrapy.Spider):
+        """
+        Fetch an image through the crawler's downloader, sending the validators of the last fetch.
 
         Args:
         ----
-            query_file_path (str):
+            url (str): The image URL.
+            spider (scrapy.Spider): The spider that generated the item.
+
         Returns:
+        -------
+            str: The image key, or the last known key (empty if none) if the fetch failed.
+        """
+        cached = self.store.lookup(url)
+        cached_key, etag, last_modified = cached or ("", None, None)
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        request = scrapy.Request(url, headers=headers, meta={"handle_httpstatus_all": True})
+
+        try:
+            response = await maybe_deferred_to_future(self.crawler.engine.download(request))
+        except Exception as e:
+            spider.logger.warning(f"Error fetching image {url}: {e}")
+            return cached_key
+
+        if response.status == 304 and cached_key:
+            return cached_key
+        if response.status != 200:
+            spider.logger.warning(f"Unexpected status {response.status} fetching image {url}")
+            return cached_key
+
+        # hashing, thumbnailing and the file & index writes run in the reactor's thread pool, off the crawl's hot path
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        return await maybe_deferred_to_future(
+            deferToThread(
+                self.store.save,
+                url,
+                response.body,
+                etag.decode("latin-1") if etag else None,
+                last_modified.decode("latin-1") if last_modified else None,
+            )
+        )
 
 
+class InsertDataPipeline:
+
+    """Spool msrp data locally and insert it into table from a background drainer."""
+
+    def __init__(
+        self,
+        backend: StorageBackend,
+        spool_dir: str,
+        spool_batch_size: int = 500,
+        spool_close_timeout: float | None = None,
+        spool_max_retries: int = 5,
+        dispatcher: EventDispatcher | None = None,
+        checkpoint: CrawlCheckpoint | None = None,
+        validator: PriceValidator | None = None,
+        validation_history_days: int = 365,
+    ):
+        """
+        Attributes
+        ----------
+            backend (StorageBackend): Storage of the price table
+            spool_dir (str): Directory holding one spool file per spider
+            spool_batch_size (int): Maximum number of items inserted per transaction
+            spool_close_timeout (float | None): Maximum seconds to wait for the spool to drain when the spider closes
+            spool_max_retries (int): Failures of a batch before the item that cannot be inserted is dead-lettered
+            dispatcher (EventDispatcher | None): Delivers price-change events, or None if events are disabled
+            checkpoint (CrawlCheckpoint | None): Records the items committed in the current run, or None if disabled
+            validator (PriceValidator | None): Quarantines outlier prices before insert, or None if disabled
+            validation_history_days (int): Days of price history the validator compares against
+        """
+        self.backend = backend
+        self.spool_dir = spool_dir
+        self.spool_batch_size = spool_batch_size
+        self.spool_close_timeout = spool_close_timeout
+        self.spool_max_retries = spool_max_retries
+        self.dispatcher = dispatcher
+        self.checkpoint = checkpoint
+        self.validator = validator
+        self.validation_history_days = validation_history_days
+
+    @classmethod
+    def from_crawler(cls, crawler):
+        """Create the pipeline with the storage backend, spool, events, checkpoint and validation chosen in settings."""
+        settings = crawler.settings
+        dispatcher = None
+        sink = build_sink(settings)
+        if sink is not None:
+            dispatcher = EventDispatcher(
+                sink,
+                batch_size=settings.getint("PRICE_EVENT_BATCH_SIZE"),
+                flush_interval=settings.getfloat("PRICE_EVENT_FLUSH_INTERVAL"),
+                max_retries=settings.getint("PRICE_EVENT_MAX_RETRIES"),
+            )
+        return cls(
+            build_backend(settings),
+            settings.get("SPOOL_DIR"),
+            spool_batch_size=settings.getint("SPOOL_BATCH_SIZE"),
+            spool_close_timeout=settings.getfloat("SPOOL_CLOSE_TIMEOUT"),
+            spool_max_retries=settings.getint("SPOOL_MAX_RETRIES"),
+            dispatcher=dispatcher,
+            checkpoint=CrawlCheckpoint(settings.get("CHECKPOINT_PATH"))
+            if settings.getbool("CHECKPOINT_ENABLED")
+            else None,
+            validator=PriceValidator(
+                max_relative_delta=settings.getfloat("VALIDATION_MAX_RELATIVE_DELTA"),
+                max_zscore=settings.getfloat("VALIDATION_MAX_ZSCORE"),
+                min_history=settings.getint("VALIDATION_MIN_HISTORY"),
+                min_msrp=settings.getfloat("VALIDATION_MIN_MSRP"),
+                max_msrp=settings.getfloat("VALIDATION_MAX_MSRP"),
+                accept_after_runs=settings.getint("VALIDATION_ACCEPT_AFTER_RUNS"),
+            )
+            if settings.getbool("VALIDATION_ENABLED")
+            else None,
+            validation_history_days=settings.getint("VALIDATION_HISTORY_DAYS"),
+        )
+
+    def open_spider(self, spider: scrapy.Spider):
+        """Start draining the spider's spool and delivering price-change events."""
+        self.logger = spider.logger
+        self.spool = Spool(os.path.join(self.spool_dir, f"{spider.name}.sqlite3"))
+        self.drainer = SpoolDrainer(
+            self.spool,
+            self.write_batch,
+            batch_size=self.spool_batch_size,
+            max_retries=self.spool_max_retries,
+        )
+        if self.dispatcher:
+            self.dispatcher.start()
+        self.drainer.start()
+
+    def close_spider(self, spider: scrapy.Spider):
+        """Drain the spool and deliver the remaining price-change events in a thread, so other spiders keep crawling."""
+        return deferToThread(self.finish, spider.settings.getfloat("PRICE_EVENT_CLOSE_TIMEOUT"))
+
+    def finish(self, event_close_timeout: float | None):
+        """
+        Wait for the spool to drain and the remaining price-change events to be delivered, then close everything.
+
+        Args:
+        ----
+            event_close_timeout (float | None): Maximum seconds to wait for the events to be delivered.
         """
-        with open(query_file_path, "r") as f:
-            query = f.read()
-        if params:
-            for key, value in params.items():
-                query = query.replace(f"$${key}$$", str(value))
-        return query
+        if self.drainer.stop(timeout=self.spool_close_timeout):
+            self.backend.close()
+        if self.dispatcher:
+            self.dispatcher.stop(timeout=event_close_timeout)
+        if self.checkpoint:
+            self.checkpoint.close()
 
     def process_item(self, item: scrapy.Item, spider: scrapy.Spider):
         """
-        Process an item to insert msrp data into table.
+        Process an item by durably appending it to the spool, committing it for the current run.
 
         Args:
         ----
@@ -164,34 +316,107 @@ class InsertDataPipeline:
 
         Returns:
         -------
-            scrapy.Item: The processed item if all required fields are present.
+            scrapy.Item: The spooled item.
         """
-        # create table if not exists
-        create_dict = {"DB_PRICE_TABLE": DB_PRICE_TABLE}
-        create_query = self.read_sql_file(f"{BASE_SQL_PATH}/create_evprice.sql", create_dict)
-        cursor.execute(create_query)
-
         adapter = ItemAdapter(item)
+        self.spool.append(adapter.asdict())
+        if self.checkpoint:
+            locale = getattr(spider, "locale", "")
+            self.checkpoint.commit_item(adapter["brand_name"], adapter["model_name"], locale)
+        return item
+
+    def write_batch(self, items: list[dict]):
+        """
+        Insert a batch of spooled items in one transaction.
+
+        A batch replayed after a crash is harmless: its items match the last msrp and are skipped. Items the validator
+        scores as outliers go to the quarantine table instead, unless they persisted over enough daily runs.
+
+        Args:
+        ----
+            items (list[dict]): The spooled items, oldest first.
+        """
+        for item in items:
+            item["create_timestamp"] = datetime.fromisoformat(item["create_timestamp"])
+            item.setdefault("image_key", "")
+
+        events = []
+        inserted = []
+        # any failure, including loading the history, rolls back so the retried batch starts on a clean transaction
+        try:
+            self.backend.open()
+
+            # score the whole batch against the price history, loaded once per run
+            reasons = [None] * len(items)
+            if self.validator:
+                if not self.validator.loaded:
+                    since = datetime.now(timezone.utc) - timedelta(days=self.validation_history_days)
+                    self.validator.load(self.backend.recent_prices(since))
+                reasons = self.validator.score(items)
+
+            for index, (item, reason) in enumerate(zip(items, reasons)):
+                if reason and self.is_persistent_outlier(item):
+                    self.logger.warning(
+                        f"Accepting {item['brand_name']} {item['model_name']} at {item['msrp']}, unchanged for "
+                        f"{self.validator.accept_after_runs} daily runs: {reason}"
+                    )
+                    reason = None
+                try:
+                    if reason:
+                        self.logger.warning(f"Quarantining {item['brand_name']} {item['model_name']}: {reason}")
+                        self.backend.quarantine(item, reason)
+                        continue
+                    is_inserted, last_msrp = self.insert_item(item)
+                except Exception as e:
+                    # the DB being down fails every item alike, so only other errors are blamed on this one
+                    if self.backend.is_transient_error(e):
+                        raise
+                    raise ItemError(index, e) from e
+                if not is_inserted:
+                    continue
+                if last_msrp is not None:
+                    events.append(build_price_change_event(item, last_msrp))
+                inserted.append(item)
+            self.backend.commit()
+        except Exception:
+            self.backend.rollback()
+            raise
+
+        if self.validator:
+            self.validator.update(inserted)
+
+        # emit price-change events once committed
+        if self.dispatcher:
+            for event in events:
+                self.dispatcher.emit(event)
+
+    def is_persistent_outlier(self, item: dict):
+        """Check whether an outlier was quarantined at the same msrp on each of the previous daily runs."""
+        since = item["create_timestamp"] - timedelta(days=self.validator.accept_after_runs)
+        quarantined = self.backend.quarantined_prices(item["brand_name"], item["model_name"], since)
+        return self.validator.is_persistent(item, quarantined)
+
+    def insert_item(self, item: dict):
+        """
+        Insert an item into table if its msrp changed.
 
-        # check if data available for specific brand name and model name
-        check_fields = ["brand_name", "model_name"]
-        check_dict = {field: adapter.get(field) for field in check_fields}
-        check_dict["DB_PRICE_TABLE"] = DB_PRICE_TABLE
-        check_query = self.read_sql_file(f"{BASE_SQL_PATH}/check_evprice_empty.sql", check_dict)
-        cursor.execute(check_query)
-        record_count = cursor.fetchone()[0]
+        Args:
+        ----
+            item (dict): The item to be inserted.
 
+        Returns:
+        -------
+            tuple[bool, float | None]: Whether the item was inserted, and the model's previous msrp (None if new).
+        """
         # check if msrp changed
-        if record_count > 0:
-            check_query = self.read_sql_file(f"{BASE_SQL_PATH}/check_evprice_last_msrp.sql", check_dict)
-            cursor.execute(check_query)
-            last_msrp = float(cursor.fetchone()[0])
-            if last_msrp == float(adapter.get("msrp")):
-                spider.logger.info("MSRP did not change for item.")
-                return None
-
-        # insert data into table
-        insert_dict = adapter.asdict()
-        insert_dict["DB_PRICE_TABLE"] = DB_PRICE_TABLE
-        insert_query = self.read_sql_file(f"{BASE_SQL_PATH}/insert_evprice_new_msrp.sql", insert_dict)
-        cursor.execute(insert_query)
+        last_msrp = self.backend.last_msrp(item["brand_name"], item["model_name"])
+        if last_msrp == float(item["msrp"]):
+            self.logger.info("MSRP did not change for item.")
+            return False, last_msrp
+
+        # insert data into table and notify readers of the new msrp
+        if not self.backend.insert(item):
+            self.logger.error(f"Record {item['ev_id']} already exists, skipping item.")
+            return False, last_msrp
+        self.backend.notify(item["brand_name"], item["model_name"])
+        return True, last_msrp
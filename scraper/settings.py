@@ -7,6 +7,9 @@
 #     https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
 #     https://docs.scrapy.org/en/latest/topics/spider-middleware.html
 
+import os
+import tempfile
+
 BOT_NAME = "scraper"
 
 SPIDER_MODULES = ["scraper.spiders"]
@@ -44,9 +47,9 @@ ROBOTSTXT_OBEY = True
 
 # Enable or disable spider middlewares
 # See https://docs.scrapy.org/en/latest/topics/spider-middleware.html
-# SPIDER_MIDDLEWARES = {
-#    "scraper.middlewares.ScraperSpiderMiddleware": 543,
-# }
+SPIDER_MIDDLEWARES = {
+    "scraper.middlewares.CheckpointMiddleware": 543,
+}
 
 # Enable or disable downloader middlewares
 # See https://docs.scrapy.org/en/latest/topics/downloader-middleware.html
@@ -66,9 +69,61 @@ ITEM_PIPELINES = {
     "scraper.pipelines.DropMissingPipeline": 300,
     "scraper.pipelines.CreateRecordIdPipeline": 301,
     "scraper.pipelines.CleanDataPipeline": 302,
-    "scraper.pipelines.InsertDataPipeline": 303,
+    "scraper.pipelines.ImageCachePipeline": 303,
+    "scraper.pipelines.InsertDataPipeline": 304,
 }
 
+# Directory of the spool and checkpoint files. The default temp dir is in-memory and per instance on Cloud Functions,
+# so undrained items and checkpoints only survive a restart on the same warm instance; point SCRAPER_STATE_DIR at a
+# durable volume (e.g., a Filestore NFS mount) to resume on any instance
+STATE_DIR = os.getenv("SCRAPER_STATE_DIR", tempfile.gettempdir())
+
+# Content-addressed image cache of ImageCachePipeline, with thumbnails as name: (max width, max height). Under the
+# default STATE_DIR it is per instance on Cloud Functions, so image keys only resolve on that instance and the ETag index
+# is lost on a cold start; set IMAGE_CACHE_STORE (or SCRAPER_STATE_DIR) to a volume shared with the image consumers
+IMAGE_CACHE_STORE = os.getenv("IMAGE_CACHE_STORE", os.path.join(STATE_DIR, "ev_price_images"))
+IMAGE_CACHE_THUMBS = {
+    "small": (270, 270),
+}
+
+# Storage of the price table: "postgres" in production, or "sqlite" to run fully in-process
+STORAGE_BACKEND = "postgres"
+STORAGE_SQLITE_PATH = "ev_price.sqlite3"
+
+# Checkpoint of the request frontier and committed items, so a retriggered run on the same UTC day only does the
+# remaining work
+CHECKPOINT_ENABLED = True
+CHECKPOINT_PATH = os.path.join(STATE_DIR, "ev_price_checkpoint.sqlite3")
+
+# Local write-ahead spool drained into the DB by InsertDataPipeline
+SPOOL_DIR = os.path.join(STATE_DIR, "ev_price_spool")
+SPOOL_BATCH_SIZE = 500
+SPOOL_CLOSE_TIMEOUT = 60.0
+# Failures of a batch before the item that cannot be inserted is found and moved to the spool's dead_letter table
+SPOOL_MAX_RETRIES = 5
+
+# Batch validation of scraped prices against recent history; outliers go to the <DB_PRICE_TABLE>_quarantine table
+VALIDATION_ENABLED = True
+VALIDATION_HISTORY_DAYS = 365
+VALIDATION_MAX_RELATIVE_DELTA = 0.4
+VALIDATION_MAX_ZSCORE = 4.0
+VALIDATION_MIN_HISTORY = 3
+VALIDATION_MIN_MSRP = 10_000
+VALIDATION_MAX_MSRP = 1_000_000
+# Daily runs in a row an outlier must be scraped at the same msrp to be accepted as a real price change (0 to never)
+VALIDATION_ACCEPT_AFTER_RUNS = 3
+
+# Price-change events emitted by InsertDataPipeline
+# PRICE_EVENT_SINK is one of "jsonl", "webhook", "pubsub" (topic as projects/<id>/topics/<id>) or "local"
+PRICE_EVENT_SINK = None
+PRICE_EVENT_JSONL_PATH = "price_events.jsonl"
+PRICE_EVENT_WEBHOOK_URL = None
+PRICE_EVENT_PUBSUB_TOPIC = None
+PRICE_EVENT_BATCH_SIZE = 100
+PRICE_EVENT_FLUSH_INTERVAL = 5.0
+PRICE_EVENT_MAX_RETRIES = 3
+PRICE_EVENT_CLOSE_TIMEOUT = 30.0
+
 # Enable and configure the AutoThrottle extension (disabled by default)
 # See https://docs.scrapy.org/en/latest/topics/autothrottle.html
 # AUTOTHROTTLE_ENABLED = True
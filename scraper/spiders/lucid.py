@@ -11,18 +11,25 @@ class LucidSpider(scrapy.Spider):
     """Lucid spider to scrape for car details."""
 
     name = "lucid_scraper"
+    brand_name = "lucid"
 
-    def __init__(self):
+    def __init__(self, base_url: str | None = None, model_list: list[tuple[str, str]] | None = None):
         """
         Attributes
         ----------
             lc (str): A string containing lowercase alphabetic characters 'abcdefghijklmnopqrstuvwxyz' for xpath translate
             uc (str): A string containing uppercase alphabetic characters 'ABCDEFGHIJKLMNOPQRSTUVWXYZ' for xpath translate
-            base_url (str): The base URL for Lucid's website.
+            base_url (str): The base URL for Lucid's website, overridable to crawl a mock site
+            model_list (list[tuple[str, str]]): The (model name, car type) of each model to scrape
         """
         self.lc = "abcdefghijklmnopqrstuvwxyz"
         self.uc = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-        self.base_url = "https://www.lucidmotors.com"
+        self.base_url = base_url or "https://www.lucidmotors.com"
+        self.model_list = model_list or [
+            ("air grand touring", "sedan"),
+            ("air pure", "sedan"),
+            ("air touring", "sedan"),
+        ]  # TODO: make this dynamic
 
     def start_requests(self):
         """
@@ -35,12 +42,7 @@ class LucidSpider(scrapy.Spider):
             Iterable[scrapy.Request]: A sequence of Scrapy requests, each specifying a URL to scrape and providing
             metadata including the model name and car type
         """
-        model_list = [
-            ("air grand touring", "sedan"),
-            ("air pure", "sedan"),
-            ("air touring", "sedan"),
-        ]  # TODO: make this dynamic
-        for model_name, car_type in model_list:
+        for model_name, car_type in self.model_list:
             url = f"{self.base_url}/{model_name.replace(' ', '-')}"
             yield scrapy.Request(
                 url=url,
@@ -61,7 +63,7 @@ class LucidSpider(scrapy.Spider):
             generator: Yields EvItem objects with the extracted information.
         """
         ev_item = EvItem()
-        ev_item["brand_name"] = "lucid"
+        ev_item["brand_name"] = self.brand_name
 
         model_name = response.meta.get("model_name")
         car_type = response.meta.get("car_type")
@@ -73,7 +75,6 @@ class LucidSpider(scrapy.Spider):
         ev_item["msrp"] = self.extract_msrp(response)
         ev_item["image_src"] = self.extract_image_src(response, model_name)
         ev_item["create_timestamp"] = datetime.now(timezone.utc)
-        print(ev_item)
         yield ev_item
 
     def extract_msrp(self, response):
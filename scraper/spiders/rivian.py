@@ -11,18 +11,24 @@ class RivianSpider(scrapy.Spider):
     """Rivian spider to scrape for car details."""
 
     name = "rivian_scraper"
+    brand_name = "rivian"
 
-    def __init__(self):
+    def __init__(self, base_url: str | None = None, model_list: list[tuple[str, str]] | None = None):
         """
         Attributes
         ----------
             lc (str): A string containing lowercase alphabetic characters 'abcdefghijklmnopqrstuvwxyz' for xpath translate
             uc (str): A string containing uppercase alphabetic characters 'ABCDEFGHIJKLMNOPQRSTUVWXYZ' for xpath translate
-            base_url (str): The base URL for Rivian's website.
+            base_url (str): The base URL for Rivian's website, overridable to crawl a mock site
+            model_list (list[tuple[str, str]]): The (model name, car type) of each model to scrape
         """
         self.lc = "abcdefghijklmnopqrstuvwxyz"
         self.uc = "ABCDEFGHIJKLMNOPQRSTUVWXYZ"
-        self.base_url = "http://www.rivian.com"
+        self.base_url = base_url or "http://www.rivian.com"
+        self.model_list = model_list or [
+            ("r1s", "suv"),
+            ("r1t", "truck"),
+        ]  # TODO: make this dynamic
 
     def start_requests(self):
         """
@@ -35,11 +41,7 @@ class RivianSpider(scrapy.Spider):
             Iterable[scrapy.Request]: A sequence of Scrapy requests, each specifying a URL to scrape and providing
             metadata including the model name and car type
         """
-        model_list = [
-            ("r1s", "suv"),
-            ("r1t", "truck"),
-        ]  # TODO: make this dynamic
-        for model_name, car_type in model_list:
+        for model_name, car_type in self.model_list:
             url = f"{self.base_url}/{model_name.replace(' ', '')}"
             yield scrapy.Request(
                 url=url,
@@ -60,7 +62,7 @@ class RivianSpider(scrapy.Spider):
             generator: Yields EvItem objects with the extracted information.
         """
         ev_item = EvItem()
-        ev_item["brand_name"] = "rivian"
+        ev_item["brand_name"] = self.brand_name
 
         model_name = response.meta.get("model_name")
         car_type = response.meta.get("car_type")
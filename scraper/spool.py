@@ -0,0 +1,231 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+
+class ItemError(Exception):
+
+    """Raised by a drainer's write_batch when one item of the batch can never be written, e.g. rejected by the DB."""
+
+    def __init__(self, index: int, error: Exception):
+        """
+        Attributes
+        ----------
+            index (int): Position of the item in the batch
+            error (Exception): The error writing it
+        """
+        super().__init__(f"item {index}: {error!r}")
+        self.index = index
+        self.error = error
+
+
+class Spool:
+
+    """Durable append-only queue of items in a SQLite file in WAL mode."""
+
+    def __init__(self, path: str):
+        """
+        Attributes
+        ----------
+            path (str): Path of the SQLite file, created if missing
+        """
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        connection = self._connection()
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS spool (id INTEGER PRIMARY KEY AUTOINCREMENT, item TEXT NOT NULL)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS checkpoint (id INTEGER PRIMARY KEY CHECK (id = 0), last_id INTEGER)"
+        )
+        connection.execute(
+            "CREATE TABLE IF NOT EXISTS dead_letter "
+            "(id INTEGER PRIMARY KEY, item TEXT NOT NULL, error TEXT NOT NULL, failed_at TEXT NOT NULL)"
+        )
+        connection.execute("INSERT OR IGNORE INTO checkpoint (id, last_id) VALUES (0, 0)")
+        connection.commit()
+
+    def _connection(self):
+        """Get this thread's connection, so the crawl and the drainer never share one."""
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30)
+            connection.execute("PRAGMA journal_mode=WAL")
+            # in WAL mode, NORMAL survives a process crash and skips an fsync per append
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def append(self, item: dict):
+        """
+        Durably append an item.
+
+        Args:
+        ----
+            item (dict): The JSON-serializable item; datetimes are stored as ISO 8601 strings.
+        """
+        connection = self._connection()
+        connection.execute("INSERT INTO spool (item) VALUES (?)", (json.dumps(item, default=datetime.isoformat),))
+        connection.commit()
+
+    def read_batch(self, limit: int):
+        """
+        Read the oldest items not yet checkpointed.
+
+        Args:
+        ----
+            limit (int): Maximum number of items to read.
+
+        Returns:
+        -------
+            list[tuple[int, dict]]: The spool id and item of each row, oldest first.
+        """
+        rows = self._connection().execute(
+            "SELECT id, item FROM spool WHERE id > (SELECT last_id FROM checkpoint) ORDER BY id LIMIT ?",
+            (limit,),
+        )
+        return [(spool_id, json.loads(item)) for spool_id, item in rows]
+
+    def checkpoint(self, last_id: int):
+        """
+        Record that every item up to last_id is committed downstream and reclaim their space.
+
+        Args:
+        ----
+            last_id (int): Spool id of the last committed item.
+        """
+        connection = self._connection()
+        connection.execute("UPDATE checkpoint SET last_id = ? WHERE id = 0", (last_id,))
+        connection.execute("DELETE FROM spool WHERE id <= ?", (last_id,))
+        connection.commit()
+
+    def dead_letter(self, spool_id: int, item: dict, error: str):
+        """
+        Move the oldest pending item, which can never be written downstream, to the dead-letter table.
+
+        Args:
+        ----
+            spool_id (int): Spool id of the item.
+            item (dict): The item.
+            error (str): The error writing it downstream.
+        """
+        connection = self._connection()
+        connection.execute(
+            "INSERT OR REPLACE INTO dead_letter (id, item, error, failed_at) VALUES (?, ?, ?, ?)",
+            (spool_id, json.dumps(item, default=datetime.isoformat), error, datetime.now().isoformat()),
+        )
+        connection.execute("UPDATE checkpoint SET last_id = ? WHERE id = 0", (spool_id,))
+        connection.execute("DELETE FROM spool WHERE id <= ?", (spool_id,))
+        connection.commit()
+
+    def pending(self):
+        """Count the items not yet checkpointed."""
+        query = "SELECT count(*) FROM spool WHERE id > (SELECT last_id FROM checkpoint)"
+        return self._connection().execute(query).fetchone()[0]
+
+
+class SpoolDrainer:
+
+    """Bulk-load spooled items downstream from a background thread."""
+
+    def __init__(
+        self,
+        spool: Spool,
+        write_batch,
+        batch_size: int = 500,
+        poll_interval: float = 1.0,
+        retry_backoff: float = 5.0,
+        max_retries: int = 5,
+    ):
+        """
+        Attributes
+        ----------
+            spool (Spool): The spool to drain
+            write_batch (Callable[[list[dict]], None]): Commits a batch of items downstream; raises on failure, with
+                ItemError if a specific item cannot be written
+            batch_size (int): Maximum number of items per batch
+            poll_interval (float): Seconds to wait for new items when the spool is empty
+            retry_backoff (float): Seconds to wait before retrying a failed batch
+            max_retries (int): ItemError failures of a batch before the failing item is moved to the dead-letter table
+        """
+        self.spool = spool
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.retry_backoff = retry_backoff
+        self.max_retries = max_retries
+        self._closing = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="spool-drainer", daemon=True)
+
+    def start(self):
+        """Start draining, beginning with anything left over from an earlier run."""
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None):
+        """
+        Drain the remaining items and stop; undrained items stay spooled for the next run.
+
+        Args:
+        ----
+            timeout (float | None): Maximum seconds to wait for the spool to empty.
+
+        Returns:
+        -------
+            bool: Whether the drainer finished before the timeout.
+        """
+        self._closing.set()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logger.warning("Stopped draining with %d items left in %s", self.spool.pending(), self.spool.path)
+            return False
+        return True
+
+    def _run(self):
+        """
+        Write batches and checkpoint them until closing with an empty spool.
+
+        Only an item the batch reports with ItemError max_retries times is moved to the dead-letter table, after the
+        items before it are written, so later items are not blocked. Any other error (the DB being down, missing
+        credentials, a bug) is retried until it is fixed, keeping every item spooled.
+        """
+        batch_size = self.batch_size
+        failures = 0
+        while True:
+            batch = self.spool.read_batch(batch_size)
+            if not batch:
+                if self._closing.is_set():
+                    return
+                self._closing.wait(self.poll_interval)
+                continue
+            try:
+                self.write_batch([item for _, item in batch])
+            except ItemError as e:
+                failures += 1
+                if failures < self.max_retries:
+                    logger.error("Error writing %d spooled items, retrying: %s", len(batch), e)
+                    time.sleep(self.retry_backoff)
+                elif e.index > 0:
+                    # write the items before the failing one on their own first
+                    batch_size = e.index
+                    failures = 0
+                else:
+                    spool_id, item = batch[0]
+                    logger.error("Moving spooled item %d to the dead-letter table: %s %s", spool_id, e.error, item)
+                    self.spool.dead_letter(spool_id, item, repr(e.error))
+                    batch_size = self.batch_size
+                    failures = 0
+                continue
+            except Exception as e:
+                logger.error("Error writing %d spooled items, retrying: %s", len(batch), e)
+                time.sleep(self.retry_backoff)
+                continue
+            self.spool.checkpoint(batch[-1][0])
+            batch_size = self.batch_size
+            failures = 0
@@ -0,0 +1 @@
+ALTER TABLE $$DB_PRICE_TABLE$$ ADD COLUMN IF NOT EXISTS image_key VARCHAR(64) NOT NULL DEFAULT ''
\ No newline at end of file
@@ -0,0 +1,5 @@
+ALTER TABLE $$DB_PRICE_TABLE$$ ADD COLUMN IF NOT EXISTS insert_timestamp TIMESTAMPTZ;
+UPDATE $$DB_PRICE_TABLE$$ SET insert_timestamp = create_timestamp WHERE insert_timestamp IS NULL;
+ALTER TABLE $$DB_PRICE_TABLE$$
+    ALTER COLUMN insert_timestamp SET DEFAULT CURRENT_TIMESTAMP,
+    ALTER COLUMN insert_timestamp SET NOT NULL
\ No newline at end of file
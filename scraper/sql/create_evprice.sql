@@ -5,5 +5,7 @@ CREATE TABLE IF NOT EXISTS $$DB_PRICE_TABLE$$ (
     car_type VARCHAR(50) NOT NULL,
     model_url VARCHAR(255) NOT NULL,
     image_src VARCHAR(255) NOT NULL, 
+    image_key VARCHAR(64) NOT NULL DEFAULT '',
     msrp float(24) NOT NULL, 
-    create_timestamp TIMESTAMPTZ NOT NULL)
\ No newline at end of file
+    create_timestamp TIMESTAMPTZ NOT NULL,
+    insert_timestamp TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP)
\ No newline at end of file
@@ -0,0 +1,11 @@
+CREATE TABLE IF NOT EXISTS $$DB_PRICE_TABLE$$_quarantine (
+    ev_id VARCHAR(32) NOT NULL, 
+    brand_name VARCHAR(50) NOT NULL, 
+    model_name VARCHAR(50) NOT NULL, 
+    car_type VARCHAR(50) NOT NULL,
+    model_url VARCHAR(255) NOT NULL,
+    image_src VARCHAR(255) NOT NULL, 
+    image_key VARCHAR(64) NOT NULL DEFAULT '',
+    msrp float(24) NOT NULL, 
+    create_timestamp TIMESTAMPTZ NOT NULL,
+    reason VARCHAR(255) NOT NULL)
\ No newline at end of file
@@ -5,6 +5,7 @@ INSERT INTO $$DB_PRICE_TABLE$$ (
     model_url,
     car_type, 
     image_src, 
+    image_key,
     msrp, 
     create_timestamp)
 VALUES (
@@ -14,5 +15,6 @@ VALUES (
     '$$model_url$$',
     '$$car_type$$', 
     '$$image_src$$', 
+    '$$image_key$$',
     $$msrp$$, 
     '$$create_timestamp$$')
\ No newline at end of file
@@ -0,0 +1,22 @@
+INSERT INTO $$DB_PRICE_TABLE$$_quarantine (
+    ev_id, 
+    brand_name, 
+    model_name, 
+    model_url,
+    car_type, 
+    image_src, 
+    image_key,
+    msrp, 
+    create_timestamp,
+    reason)
+VALUES (
+    '$$ev_id$$',
+    '$$brand_name$$', 
+    '$$model_name$$',
+    '$$model_url$$',
+    '$$car_type$$', 
+    '$$image_src$$', 
+    '$$image_key$$',
+    $$msrp$$, 
+    '$$create_timestamp$$',
+    '$$reason$$')
\ No newline at end of file
@@ -0,0 +1 @@
+SELECT pg_notify('$$DB_PRICE_CHANNEL$$', '$$brand_name$$/$$model_name$$')
\ No newline at end of file
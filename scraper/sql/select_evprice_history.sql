@@ -0,0 +1,17 @@
+SELECT
+    brand_name,
+    model_name,
+    car_type,
+    model_url,
+    image_src,
+    image_key,
+    msrp,
+    create_timestamp
+FROM
+    $$DB_PRICE_TABLE$$
+WHERE
+    brand_name = %(brand_name)s AND
+    model_name = %(model_name)s AND
+    create_timestamp < %(before)s
+ORDER BY create_timestamp DESC
+LIMIT %(limit)s
\ No newline at end of file
@@ -0,0 +1,12 @@
+SELECT DISTINCT ON (brand_name, model_name)
+    brand_name,
+    model_name,
+    car_type,
+    model_url,
+    image_src,
+    image_key,
+    msrp,
+    create_timestamp
+FROM
+    $$DB_PRICE_TABLE$$
+ORDER BY brand_name, model_name, create_timestamp DESC
\ No newline at end of file
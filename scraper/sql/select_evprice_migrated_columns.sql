@@ -0,0 +1,10 @@
+SELECT
+    column_name
+FROM
+    information_schema.columns
+WHERE
+    table_schema = current_schema() AND
+    table_name = lower('$$DB_PRICE_TABLE$$') AND
+    column_name IN ('image_key', 'insert_timestamp') AND
+    -- insert_timestamp is only migrated once NOT NULL
+    is_nullable = 'NO'
\ No newline at end of file
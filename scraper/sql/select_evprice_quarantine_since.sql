@@ -0,0 +1,10 @@
+SELECT
+    msrp,
+    create_timestamp
+FROM
+    $$DB_PRICE_TABLE$$_quarantine
+WHERE
+    brand_name = '$$brand_name$$' AND
+    model_name = '$$model_name$$' AND
+    create_timestamp >= '$$since$$'
+ORDER BY create_timestamp
\ No newline at end of file
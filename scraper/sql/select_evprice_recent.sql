@@ -0,0 +1,32 @@
+SELECT
+    brand_name,
+    model_name,
+    msrp,
+    create_timestamp
+FROM
+    $$DB_PRICE_TABLE$$
+WHERE
+    create_timestamp >= '$$since$$'
+
+UNION
+
+-- the latest msrp of every model, however old, since the table only stores price changes
+SELECT
+    ep.brand_name,
+    ep.model_name,
+    ep.msrp,
+    ep.create_timestamp
+FROM
+    $$DB_PRICE_TABLE$$ as ep INNER JOIN (
+        SELECT
+            brand_name,
+            model_name,
+            MAX(create_timestamp) AS latest_timestamp
+        FROM
+            $$DB_PRICE_TABLE$$
+        GROUP BY 1, 2
+    ) as lt ON
+        ep.brand_name = lt.brand_name AND
+        ep.model_name = lt.model_name AND
+        ep.create_timestamp = lt.latest_timestamp
+ORDER BY create_timestamp
\ No newline at end of file
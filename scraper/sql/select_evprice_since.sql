@@ -0,0 +1,17 @@
+SELECT
+    ev_id,
+    brand_name,
+    model_name,
+    car_type,
+    model_url,
+    image_src,
+    image_key,
+    msrp,
+    create_timestamp,
+    insert_timestamp
+FROM
+    $$DB_PRICE_TABLE$$
+WHERE
+    (insert_timestamp, ev_id) > ('$$watermark$$', '$$watermark_ev_id$$') AND
+    insert_timestamp <= now() - interval '$$lag_seconds$$ seconds'
+ORDER BY insert_timestamp, ev_id
\ No newline at end of file
@@ -0,0 +1,322 @@
+import os
+import sqlite3
+from datetime import datetime
+
+from dotenv import load_dotenv
+
+from .credentials import get_secret_payload
+from .utils import read_sql_file
+
+################################
+# Set Up Environment Variables #
+################################
+
+# Using .env, load DB variables
+load_dotenv()
+BASE_SQL_PATH = "scraper/sql"
+DB_HOSTNAME = os.getenv("DB_HOSTNAME")
+DB_USERNAME = os.getenv("DB_USERNAME")
+DB_DATABASE = os.getenv("DB_DATABASE")
+DB_PORT = os.getenv("DB_PORT")
+DB_PRICE_TABLE = os.getenv("DB_PRICE_TABLE")
+DB_PRICE_CHANNEL = os.getenv("DB_PRICE_CHANNEL")
+
+
+#######################
+# Initialize Backends #
+#######################
+
+
+class StorageBackend:
+
+    """Price table storage shared by every backend; subclasses only decide how to connect."""
+
+    # DB-API IntegrityError of the driver, set by subclasses
+    integrity_error = ()
+
+    def __init__(self, table: str = DB_PRICE_TABLE):
+        """
+        Attributes
+        ----------
+            table (str): Name of the price table
+            connection (object or None): DB-API connection, opened on first use
+        """
+        self.table = table
+        self.connection = None
+
+    def connect(self):
+        """Open a DB-API connection in a transaction that the backend commits."""
+        raise NotImplementedError
+
+    def create_table(self):
+        """Create the price and quarantine tables if they do not exist."""
+        self.execute("create_evprice.sql")
+        self.execute("create_evprice_quarantine.sql")
+
+    def open(self):
+        """Connect and create the price table, unless already connected; a failed open leaves no connection behind."""
+        if self.connection is not None:
+            return
+        connection = self.connect()
+        # queries run on self.connection, so it is only kept once the tables are created and committed
+        self.connection = connection
+        try:
+            self.create_table()
+            self.commit()
+        except Exception:
+            self.connection = None
+            try:
+                connection.rollback()
+            finally:
+                connection.close()
+            raise
+
+    def execute(self, sql_file: str, params: dict | None = None):
+        """
+        Run a query from the sql directory.
+
+        Args:
+        ----
+            sql_file (str): Name of the sql file.
+            params (dict | None): Values substituted into the query's `$$key$$` placeholders.
+
+        Returns:
+        -------
+            object: The cursor the query ran on.
+        """
+        query = read_sql_file(f"{BASE_SQL_PATH}/{sql_file}", {**(params or {}), "DB_PRICE_TABLE": self.table})
+        cursor = self.cursor()
+        cursor.execute(query)
+        return cursor
+
+    def cursor(self):
+        """Get a cursor in the current transaction; drivers that do not start one implicitly start it here."""
+        return self.connection.cursor()
+
+    def last_msrp(self, brand_name: str, model_name: str):
+        """
+        Get the latest msrp of a model.
+
+        Args:
+        ----
+            brand_name (str): The brand name.
+            model_name (str): The model name.
+
+        Returns:
+        -------
+            float or None: The latest msrp, or None if the model has no records.
+        """
+        check_dict = {"brand_name": brand_name, "model_name": model_name}
+        record_count = self.execute("check_evprice_empty.sql", check_dict).fetchone()[0]
+        if record_count == 0:
+            return None
+        return float(self.execute("check_evprice_last_msrp.sql", check_dict).fetchone()[0])
+
+    def recent_prices(self, since: datetime):
+        """
+        Get every price created since a timestamp, plus the latest price of every model however old it is.
+
+        Args:
+        ----
+            since (datetime): The earliest create_timestamp to include.
+
+        Returns:
+        -------
+            list[tuple[str, str, float]]: The brand name, model name and msrp of each price, oldest first.
+        """
+        rows = self.execute("select_evprice_recent.sql", {"since": since}).fetchall()
+        return [(brand_name, model_name, float(msrp)) for brand_name, model_name, msrp, _ in rows]
+
+    def quarantine(self, item: dict, reason: str):
+        """
+        Set aside an item that failed validation instead of inserting it.
+
+        Args:
+        ----
+            item (dict): The item.
+            reason (str): Why the item failed validation.
+        """
+        self.execute("insert_evprice_quarantine.sql", {**item, "reason": reason})
+
+    def quarantined_prices(self, brand_name: str, model_name: str, since: datetime):
+        """
+        Get a model's prices quarantined since a timestamp.
+
+        Args:
+        ----
+            brand_name (str): The brand name.
+            model_name (str): The model name.
+            since (datetime): The earliest create_timestamp to include.
+
+        Returns:
+        -------
+            list[tuple[float, datetime]]: The msrp and create_timestamp of each quarantined price, oldest first.
+        """
+        select_dict = {"brand_name": brand_name, "model_name": model_name, "since": since}
+        rows = self.execute("select_evprice_quarantine_since.sql", select_dict).fetchall()
+        # SQLite returns timestamps as the strings they were inserted as
+        return [
+            (
+                float(msrp),
+                create_timestamp
+                if isinstance(create_timestamp, datetime)
+                else datetime.fromisoformat(create_timestamp),
+            )
+            for msrp, create_timestamp in rows
+        ]
+
+    def insert(self, item: dict):
+        """
+        Insert an item into the price table without aborting the transaction if its record already exists.
+
+        Args:
+        ----
+            item (dict): The item to be inserted.
+
+        Returns:
+        -------
+            bool: Whether the item was inserted.
+        """
+        cursor = self.cursor()
+        cursor.execute("SAVEPOINT insert_item")
+        try:
+            self.execute("insert_evprice_new_msrp.sql", item)
+        except self.integrity_error:
+            cursor.execute("ROLLBACK TO SAVEPOINT insert_item")
+            return False
+        cursor.execute("RELEASE SAVEPOINT insert_item")
+        return True
+
+    def notify(self, brand_name: str, model_name: str):
+        """Tell readers that a model has a new msrp; a no-op unless the backend supports it."""
+
+    def is_transient_error(self, error: Exception):
+        """Check whether an error comes from the DB being unreachable or busy, rather than from the data written."""
+        return False
+
+    def commit(self):
+        """Commit the current transaction."""
+        self.connection.commit()
+
+    def rollback(self):
+        """Roll back the current transaction, dropping the connection if it is broken."""
+        if self.connection is None:
+            return
+        try:
+            self.connection.rollback()
+        except Exception:
+            self.close()
+
+    def close(self):
+        """Close the connection, if open."""
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            finally:
+                self.connection = None
+
+
+class PostgresBackend(StorageBackend):
+
+    """Price table in the production PostgreSQL DB."""
+
+    def connect(self):
+        """Connect with the DB password, importing psycopg2 only once a connection is needed."""
+        import psycopg2
+
+        self.integrity_error = psycopg2.IntegrityError
+        return psycopg2.connect(
+            host=DB_HOSTNAME,
+            user=DB_USERNAME,
+            password=get_secret_payload(),
+            dbname=DB_DATABASE,
+            port=DB_PORT,
+        )
+
+    def open(self):
+        """Connect and create or migrate the price table, reconnecting if the connection was closed."""
+        if self.connection is not None and self.connection.closed:
+            self.connection = None
+        super().open()
+
+    def create_table(self):
+        """Create the price table if it does not exist, adding columns missing from older tables."""
+        super().create_table()
+        # ALTER TABLE locks out readers even when the column exists, so only run the migrations still needed
+        migrated = {column for (column,) in self.execute("select_evprice_migrated_columns.sql").fetchall()}
+        if "image_key" not in migrated:
+            self.execute("alter_evprice_add_image_key.sql")
+        if "insert_timestamp" not in migrated:
+            self.execute("alter_evprice_add_insert_timestamp.sql")
+
+    def is_transient_error(self, error: Exception):
+        """Check whether an error comes from the connection, rather than from the data written."""
+        import psycopg2
+
+        return isinstance(error, (psycopg2.OperationalError, psycopg2.InterfaceError))
+
+    def notify(self, brand_name: str, model_name: str):
+        """Notify readers (e.g., the read API cache) on DB_PRICE_CHANNEL, delivered on commit."""
+        if DB_PRICE_CHANNEL:
+            notify_dict = {"brand_name": brand_name, "model_name": model_name, "DB_PRICE_CHANNEL": DB_PRICE_CHANNEL}
+            self.execute("notify_evprice_new_msrp.sql", notify_dict)
+
+
+class SQLiteBackend(StorageBackend):
+
+    """Price table in an embedded SQLite file, for local runs, tests and benchmarks."""
+
+    integrity_error = sqlite3.IntegrityError
+
+    def __init__(self, path: str, table: str = DB_PRICE_TABLE):
+        """
+        Attributes
+        ----------
+            path (str): Path of the SQLite file, or ":memory:"
+        """
+        super().__init__(table)
+        self.path = path
+
+    def connect(self):
+        """Open the SQLite file in WAL mode, with transactions started explicitly by `cursor`."""
+        # opened by the spool drainer but closed from the crawl thread
+        connection = sqlite3.connect(self.path, timeout=30, isolation_level=None, check_same_thread=False)
+        connection.execute("PRAGMA journal_mode=WAL")
+        return connection
+
+    def cursor(self):
+        """
+        Get a cursor, starting a transaction first if none is open.
+
+        The sqlite3 module only starts transactions implicitly before DML, so a SAVEPOINT opened outside one would
+        commit on RELEASE; starting every transaction here keeps each batch atomic, as on PostgreSQL.
+        """
+        if not self.connection.in_transaction:
+            # take the write lock up front, so drainers of concurrent spiders wait instead of failing to upgrade
+            self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection.cursor()
+
+    def is_transient_error(self, error: Exception):
+        """Check whether an error comes from the file being locked or unreachable; SQL errors are OperationalError too."""
+        message = str(error)
+        return isinstance(error, sqlite3.OperationalError) and ("locked" in message or "unable to open" in message)
+
+
+def build_backend(settings):
+    """
+    Build the storage backend chosen by the STORAGE_BACKEND setting.
+
+    Args:
+    ----
+        settings (scrapy.settings.Settings): The crawler settings.
+
+    Returns:
+    -------
+        StorageBackend: The unopened backend.
+    """
+    backend_name = settings.get("STORAGE_BACKEND")
+    if backend_name == "postgres":
+        return PostgresBackend()
+    if backend_name == "sqlite":
+        return SQLiteBackend(settings.get("STORAGE_SQLITE_PATH"))
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend_name}")
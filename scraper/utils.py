@@ -0,0 +1,19 @@
+def read_sql_file(query_file_path: str, params: dict | None = None):
+    """
+    Read sql from file path and fill in its placeholders.
+
+    Args:
+    ----
+        query_file_path (str): Path to the sql file.
+        params (dict | None): Values to substitute for each `$$key$$` placeholder in the query.
+
+    Returns:
+    -------
+        str: The query with placeholders replaced.
+    """
+    with open(query_file_path, "r") as f:
+        query = f.read()
+    if params:
+        for key, value in params.items():
+            query = query.replace(f"$${key}$$", str(value))
+    return query
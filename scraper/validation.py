@@ -0,0 +1,162 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+
+class PriceValidator:
+
+    """Score batches of scraped prices against each model's recent price history, all models at once."""
+
+    def __init__(
+        self,
+        max_relative_delta: float = 0.4,
+        max_zscore: float = 4.0,
+        min_history: int = 3,
+        min_log_std: float = 0.1,
+        min_msrp: float = 10_000.0,
+        max_msrp: float = 1_000_000.0,
+        accept_after_runs: int = 3,
+    ):
+        """
+        Attributes
+        ----------
+            max_relative_delta (float): Largest accepted change relative to the model's last msrp
+            max_zscore (float): Largest accepted z-score of the log msrp against the model's history
+            min_history (int): Number of past prices a model needs before its z-score is used
+            min_log_std (float): Floor of the log msrp standard deviation, so a flat history does not flag every change
+            min_msrp (float): Smallest plausible msrp, applied to every model including new ones
+            max_msrp (float): Largest plausible msrp, applied to every model including new ones
+            accept_after_runs (int): Daily runs in a row an outlier must be scraped at the same msrp to be accepted as a
+                real price change, or 0 to never accept outliers
+        """
+        self.max_relative_delta = max_relative_delta
+        self.max_zscore = max_zscore
+        self.min_history = min_history
+        self.min_log_std = min_log_std
+        self.min_msrp = min_msrp
+        self.max_msrp = max_msrp
+        self.accept_after_runs = accept_after_runs
+        self.loaded = False
+        self.model_index = {}
+        self.last_msrp = np.empty(0)
+        self.log_mean = np.empty(0)
+        self.log_std = np.empty(0)
+        self.history_count = np.empty(0, dtype=np.int64)
+
+    def load(self, rows: list[tuple]):
+        """
+        Load the recent price series of every model.
+
+        Args:
+        ----
+            rows (list[tuple]): (brand_name, model_name, msrp) of each recent price, oldest first, including the latest
+                price of every model.
+        """
+        self.loaded = True
+        self.model_index = {}
+        model_ids = np.array([self.model_index.setdefault((row[0], row[1]), len(self.model_index)) for row in rows])
+        msrp = np.array([row[2] for row in rows], dtype=np.float64)
+        n_models = len(self.model_index)
+        if not n_models:
+            return
+
+        # rows are oldest first, so the last write per model wins
+        self.last_msrp = np.empty(n_models)
+        self.last_msrp[model_ids] = msrp
+
+        log_msrp = np.log(msrp)
+        self.history_count = np.bincount(model_ids, minlength=n_models)
+        self.log_mean = np.bincount(model_ids, weights=log_msrp, minlength=n_models) / self.history_count
+        log_sq_mean = np.bincount(model_ids, weights=log_msrp**2, minlength=n_models) / self.history_count
+        self.log_std = np.sqrt(np.maximum(log_sq_mean - self.log_mean**2, 0))
+
+    def score(self, items: list[dict]):
+        """
+        Score a batch of items.
+
+        Args:
+        ----
+            items (list[dict]): The items, each with brand_name, model_name and msrp.
+
+        Returns:
+        -------
+            list[str | None]: The reason each item is an outlier, or None if it looks valid.
+        """
+        msrp = np.array([float(item["msrp"]) for item in items], dtype=np.float64)
+        model_ids = np.array([self.model_index.get((item["brand_name"], item["model_name"]), -1) for item in items])
+        known = model_ids >= 0
+        ids = np.where(known, model_ids, 0)
+
+        out_of_range = ~np.isfinite(msrp) | (msrp < self.min_msrp) | (msrp > self.max_msrp)
+
+        relative_delta = np.zeros_like(msrp)
+        zscore = np.zeros_like(msrp)
+        changed = np.ones(len(items), dtype=bool)
+        if len(self.model_index):
+            last_msrp = self.last_msrp[ids]
+            # an unchanged msrp was already accepted, whatever the history says
+            changed = ~known | (msrp != last_msrp)
+            relative_delta = np.where(known, np.abs(msrp - last_msrp) / last_msrp, 0)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                log_std = np.maximum(self.log_std[ids], self.min_log_std)
+                zscore = np.abs(np.log(msrp) - self.log_mean[ids]) / log_std
+            zscore = np.where(known & (self.history_count[ids] >= self.min_history), zscore, 0)
+
+        reasons = []
+        for i in range(len(items)):
+            if not changed[i]:
+                reasons.append(None)
+            elif out_of_range[i]:
+                reasons.append(f"msrp {msrp[i]} outside [{self.min_msrp}, {self.max_msrp}]")
+            elif relative_delta[i] > self.max_relative_delta:
+                reasons.append(f"relative delta {relative_delta[i]:.3f} above {self.max_relative_delta}")
+            elif zscore[i] > self.max_zscore:
+                reasons.append(f"z-score {zscore[i]:.2f} above {self.max_zscore}")
+            else:
+                reasons.append(None)
+        return reasons
+
+    def is_persistent(self, item: dict, quarantined: list[tuple[float, datetime]]):
+        """
+        Check whether an outlier was scraped at the same msrp, and quarantined, on each of the previous daily runs.
+
+        A mis-parse rarely repeats exactly for days in a row, while a real price change above the thresholds does; such
+        a price is accepted on its accept_after_runs-th run.
+
+        Args:
+        ----
+            item (dict): The outlier item.
+            quarantined (list[tuple[float, datetime]]): The msrp and create_timestamp of the model's quarantined prices
+                over at least the last accept_after_runs days.
+
+        Returns:
+        -------
+            bool: Whether the item should be accepted.
+        """
+        if self.accept_after_runs < 1:
+            return False
+        run_date = item["create_timestamp"].astimezone(timezone.utc).date()
+        same_msrp_dates = {
+            create_timestamp.astimezone(timezone.utc).date()
+            for msrp, create_timestamp in quarantined
+            if msrp == float(item["msrp"])
+        }
+        return all(run_date - timedelta(days=n) in same_msrp_dates for n in range(1, self.accept_after_runs))
+
+    def update(self, items: list[dict]):
+        """
+        Make accepted items the last msrp of their models, adding models seen for the first time.
+
+        Args:
+        ----
+            items (list[dict]): The inserted items.
+        """
+        for item in items:
+            key = (item["brand_name"], item["model_name"])
+            if key not in self.model_index:
+                self.model_index[key] = len(self.model_index)
+                self.last_msrp = np.append(self.last_msrp, 0.0)
+                self.log_mean = np.append(self.log_mean, np.log(float(item["msrp"])))
+                self.log_std = np.append(self.log_std, 0.0)
+                self.history_count = np.append(self.history_count, 0)
+            self.last_msrp[self.model_index[key]] = float(item["msrp"])
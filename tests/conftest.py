@@ -0,0 +1,11 @@
+import os
+
+import pytest
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture(autouse=True)
+def repo_root(monkeypatch):
+    """Run every test from the repo root, where the sql directory paths are relative to."""
+    monkeypatch.chdir(REPO_ROOT)
@@ -0,0 +1,79 @@
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import ThreadingHTTPServer
+
+import psycopg2
+import pytest
+
+from api.cache import TTLCache
+from api.main import PriceReader, PriceRequestHandler
+
+
+class FakePool:
+
+    """Connection pool stand-in for readers that never reach the DB."""
+
+    maxconn = 2
+
+
+def test_concurrent_misses_load_once():
+    """Concurrent misses on the same key wait for a single load instead of each querying the DB."""
+    reader = PriceReader(FakePool(), TTLCache())
+    loads = []
+
+    def load():
+        loads.append(1)
+        time.sleep(0.1)
+        return {"items": []}
+
+    threads = [threading.Thread(target=reader.cached, args=(("latest",), load)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(loads) == 1
+
+
+def test_load_overlapping_invalidation_is_not_cached():
+    """A response loaded before a new price was notified is served once, but not cached over the invalidation."""
+    reader = PriceReader(FakePool(), TTLCache())
+    loads = []
+
+    def load():
+        loads.append(1)
+        if len(loads) == 1:
+            reader.invalidate_model("tesla", "model s")
+        return {"items": [len(loads)]}
+
+    reader.cached(("latest",), load)
+    body, _ = reader.cached(("latest",), load)
+    assert len(loads) == 2 and body == b'{"items": [2]}'
+    reader.cached(("latest",), load)
+    assert len(loads) == 2
+
+
+@pytest.fixture
+def server():
+    """Serve the API on a free port with a reader whose DB is down."""
+    reader = PriceReader(FakePool(), TTLCache())
+
+    def latest():
+        raise psycopg2.OperationalError("connection refused")
+
+    reader.latest = latest
+    PriceRequestHandler.reader = reader
+    server = ThreadingHTTPServer(("127.0.0.1", 0), PriceRequestHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def test_db_errors_are_service_unavailable(server):
+    """A DB error is answered with a 503 instead of dropping the connection."""
+    with pytest.raises(urllib.error.HTTPError) as e:
+        urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/prices/latest", timeout=5)
+    assert e.value.code == 503
+    assert e.value.headers["Retry-After"] == "5"
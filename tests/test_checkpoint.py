@@ -0,0 +1,107 @@
+from types import SimpleNamespace
+
+import scrapy
+from scrapy.http import HtmlResponse
+from scrapy.settings import Settings
+from scrapy.utils.request import RequestFingerprinter
+
+from scraper.checkpoint import CrawlCheckpoint
+from scraper.middlewares import CheckpointMiddleware
+
+RUN_ID = "2023-11-10"
+START_URL = "https://www.tesla.com/inventory"
+
+
+class StubSpider(scrapy.Spider):
+
+    """Spider with a start page listing models, each parsed from its own page."""
+
+    name = "tesla"
+    brand_name = "tesla"
+
+    def parse(self, response):
+        """Parse the start page."""
+
+    def parse_model(self, response):
+        """Parse a model page."""
+
+
+def build_middleware(path: str, run_id: str = RUN_ID):
+    """Build the middleware on a checkpoint file, with a stub crawler that only fingerprints requests."""
+    crawler = SimpleNamespace(settings=Settings({"REQUEST_FINGERPRINTER_IMPLEMENTATION": "2.7"}))
+    crawler.request_fingerprinter = RequestFingerprinter(crawler)
+    return CheckpointMiddleware(crawler, CrawlCheckpoint(path, run_id))
+
+
+def model_request(spider: StubSpider, model_name: str):
+    """Build the request of a model page."""
+    url = f"https://www.tesla.com/{model_name.replace(' ', '').lower()}"
+    return scrapy.Request(url, callback=spider.parse_model, meta={"model_name": model_name})
+
+
+def respond(request: scrapy.Request):
+    """Build an empty response to a request."""
+    return HtmlResponse(request.url, request=request, body=b"")
+
+
+def test_committed_models_are_skipped(tmp_path):
+    """Start requests of models whose item was committed in the current run are not yielded again."""
+    middleware = build_middleware(str(tmp_path / "checkpoint.sqlite3"))
+    spider = StubSpider()
+    middleware.checkpoint.commit_item("tesla", "model s", "")
+
+    requests = list(
+        middleware.process_start_requests([model_request(spider, "Model S"), model_request(spider, "Model X")], spider)
+    )
+    assert [request.meta["model_name"] for request in requests] == ["Model X"]
+    middleware.checkpoint.close()
+
+
+def test_pending_requests_are_resumed(tmp_path):
+    """After an interruption, a processed start request is skipped and the requests it led to are yielded again."""
+    path = str(tmp_path / "checkpoint.sqlite3")
+    middleware = build_middleware(path)
+    spider = StubSpider()
+    start = scrapy.Request(START_URL)
+    list(middleware.process_start_requests([start], spider))
+    list(middleware.process_spider_output(respond(start), [model_request(spider, "Model S")], spider))
+    middleware.checkpoint.close()
+
+    middleware = build_middleware(path)
+    requests = list(middleware.process_start_requests([scrapy.Request(START_URL)], spider))
+    assert [request.url for request in requests] == ["https://www.tesla.com/models"]
+    assert requests[0].callback == spider.parse_model
+    assert requests[0].meta["model_name"] == "Model S"
+    middleware.checkpoint.close()
+
+
+def test_request_finishes_after_its_output_is_consumed(tmp_path):
+    """A response is only marked processed once every request and item it returned has been passed on."""
+    middleware = build_middleware(str(tmp_path / "checkpoint.sqlite3"))
+    spider = StubSpider()
+    start = scrapy.Request(START_URL)
+    list(middleware.process_start_requests([start], spider))
+    fingerprint = middleware.fingerprint(start)
+
+    output = middleware.process_spider_output(respond(start), [model_request(spider, "Model S"), {"msrp": 1}], spider)
+    next(output)
+    assert not middleware.checkpoint.is_request_done("tesla", fingerprint)
+    list(output)
+    assert middleware.checkpoint.is_request_done("tesla", fingerprint)
+    middleware.checkpoint.close()
+
+
+def test_rows_of_other_days_are_pruned(tmp_path):
+    """Opening the checkpoint for a new day drops the frontier and committed items of earlier runs."""
+    path = str(tmp_path / "checkpoint.sqlite3")
+    checkpoint = CrawlCheckpoint(path, "2023-11-09")
+    checkpoint.add_request("tesla", "ab", START_URL, None, {})
+    checkpoint.commit_item("tesla", "model s", "")
+    checkpoint.close()
+
+    checkpoint = CrawlCheckpoint(path, RUN_ID)
+    assert checkpoint.pending_requests("tesla") == []
+    assert not checkpoint.is_item_committed("tesla", "model s", "")
+    assert checkpoint.connection.execute("SELECT COUNT(*) FROM frontier").fetchone()[0] == 0
+    assert checkpoint.connection.execute("SELECT COUNT(*) FROM committed").fetchone()[0] == 0
+    checkpoint.close()
@@ -0,0 +1,36 @@
+import os
+
+from scraper.credentials import read_secret_cache, write_secret_cache
+
+
+def test_cache_round_trip(tmp_path):
+    """A written payload is read back from an owner-only file."""
+    path = str(tmp_path / "ev_price" / "secret")
+    write_secret_cache(path, "hunter2")
+    assert os.stat(path).st_mode & 0o777 == 0o600
+    assert read_secret_cache(path, ttl=60) == "hunter2"
+    assert read_secret_cache(path, ttl=0) is None
+
+
+def test_cache_readable_by_others_is_ignored(tmp_path):
+    """A cache file others can read, e.g. pre-created by another user, is not trusted."""
+    path = tmp_path / "secret"
+    path.write_text("planted")
+    path.chmod(0o644)
+    assert read_secret_cache(str(path), ttl=60) is None
+
+
+def test_symlinked_cache_is_not_followed(tmp_path):
+    """A symlink in place of the cache file is neither read nor written through."""
+    target = tmp_path / "target"
+    target.write_text("planted")
+    target.chmod(0o600)
+    cache_dir = tmp_path / "ev_price"
+    cache_dir.mkdir(mode=0o700)
+    path = cache_dir / "secret"
+    path.symlink_to(target)
+    assert read_secret_cache(str(path), ttl=60) is None
+
+    write_secret_cache(str(path), "hunter2")
+    assert target.read_text() == "planted"
+    assert not path.is_symlink()
@@ -0,0 +1,117 @@
+import json
+import threading
+
+from scraper import events
+from scraper.events import EventDispatcher, JsonlSink
+
+
+class RecordingSink:
+
+    """Sink that records each delivered batch, failing the first `failures` deliveries."""
+
+    def __init__(self, failures: int = 0):
+        """
+        Attributes
+        ----------
+            failures (int): Number of sends that fail before the sink recovers
+            attempts (int): Number of sends so far
+            batches (list[list[int]]): The event numbers of each delivered batch
+        """
+        self.failures = failures
+        self.attempts = 0
+        self.batches = []
+
+    def send(self, batch: list[dict]):
+        """Record a batch, or fail while failures remain."""
+        self.attempts += 1
+        if self.attempts <= self.failures:
+            raise ConnectionError("sink is down")
+        self.batches.append([event["i"] for event in batch])
+
+
+def record_sleeps(monkeypatch):
+    """Skip the dispatcher's backoff sleeps, recording their durations."""
+    sleeps = []
+    monkeypatch.setattr(events.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def test_events_are_delivered_in_batches():
+    """Queued events are delivered in order, at most batch_size at a time."""
+    sink = RecordingSink()
+    dispatcher = EventDispatcher(sink, batch_size=3, flush_interval=60)
+    for i in range(7):
+        dispatcher.emit({"i": i})
+    dispatcher.start()
+    dispatcher.stop(timeout=5)
+    assert sink.batches == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+def test_stop_flushes_partial_batch():
+    """Stopping delivers the events still waiting for their batch to fill or their flush interval."""
+    sink = RecordingSink()
+    dispatcher = EventDispatcher(sink, batch_size=100, flush_interval=60)
+    dispatcher.start()
+    dispatcher.emit({"i": 0})
+    dispatcher.stop(timeout=5)
+    assert not dispatcher._thread.is_alive()
+    assert sink.batches == [[0]]
+
+
+def test_failed_delivery_is_retried_with_backoff(monkeypatch):
+    """A failing delivery is retried after exponentially growing delays until it succeeds."""
+    sleeps = record_sleeps(monkeypatch)
+    sink = RecordingSink(failures=2)
+    dispatcher = EventDispatcher(sink, max_retries=3, retry_backoff=1.0)
+    dispatcher.emit({"i": 0})
+    dispatcher.start()
+    dispatcher.stop(timeout=5)
+    assert sleeps == [1.0, 2.0]
+    assert sink.batches == [[0]]
+
+
+def test_batch_is_dropped_after_max_retries(monkeypatch):
+    """A batch still failing after max_retries is dropped, and the next batch is delivered."""
+    sleeps = record_sleeps(monkeypatch)
+    sink = RecordingSink(failures=3)
+    dispatcher = EventDispatcher(sink, batch_size=1, max_retries=2, retry_backoff=1.0)
+    dispatcher.emit({"i": 0})
+    dispatcher.emit({"i": 1})
+    dispatcher.start()
+    dispatcher.stop(timeout=5)
+    assert sleeps == [1.0, 2.0]
+    assert sink.attempts == 4
+    assert sink.batches == [[1]]
+
+
+def test_events_are_dropped_when_queue_is_full():
+    """Emitting never blocks: events beyond max_queue_size are dropped."""
+    sink = RecordingSink()
+    dispatcher = EventDispatcher(sink, max_queue_size=2)
+    for i in range(3):
+        dispatcher.emit({"i": i})
+    dispatcher.start()
+    dispatcher.stop(timeout=5)
+    assert sink.batches == [[0, 1]]
+
+
+def test_jsonl_sinks_on_one_file_do_not_interleave(tmp_path):
+    """Sinks of concurrent spiders appending to the same file each write whole lines."""
+    path = str(tmp_path / "events.jsonl")
+    batch = [{"i": i, "model_name": "x" * 100} for i in range(500)]
+
+    def send():
+        """Append batches from a sink of its own."""
+        sink = JsonlSink(path)
+        for _ in range(10):
+            sink.send(batch)
+
+    threads = [threading.Thread(target=send) for _ in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    with open(path) as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 3 * 10 * 500
+    assert [json.loads(line)["i"] for line in lines] == [i for _ in range(30) for i in range(500)]
@@ -0,0 +1,36 @@
+import json
+from datetime import datetime, timezone
+
+import pyarrow.parquet as pq
+
+from export.main import (
+    INITIAL_WATERMARK,
+    read_watermark,
+    write_partitions,
+    write_watermark,
+)
+
+
+def test_watermark_round_trip(tmp_path):
+    """The watermark keeps the insert_timestamp and ev_id of the last exported row."""
+    assert read_watermark(str(tmp_path)) == INITIAL_WATERMARK
+    watermark = (datetime(2023, 11, 2, 8, tzinfo=timezone.utc), "abc")
+    write_watermark(str(tmp_path), watermark)
+    assert read_watermark(str(tmp_path)) == watermark
+
+
+def test_create_timestamp_watermark_is_migrated(tmp_path):
+    """A watermark written before insert_timestamp existed resumes from its create_timestamp."""
+    (tmp_path / "_watermark.json").write_text(json.dumps({"create_timestamp": "2023-11-01T00:00:00+00:00"}))
+    assert read_watermark(str(tmp_path)) == (datetime(2023, 11, 1, tzinfo=timezone.utc), "")
+
+
+def test_backfilled_rows_are_partitioned_by_create_date(tmp_path):
+    """A row inserted long after it was created lands in the partition of its create_timestamp."""
+    created = datetime(2022, 5, 1, tzinfo=timezone.utc)
+    inserted = datetime(2023, 11, 2, tzinfo=timezone.utc)
+    row = ("abc", "tesla", "model s", "sedan", "http://a", "http://a.jpg", "", 74990.0, created, inserted)
+    assert write_partitions(str(tmp_path), [row], "part-0.parquet") == 1
+    table = pq.read_table(tmp_path / "create_date=2022-05-01" / "part-0.parquet")
+    assert table.column("ev_id").to_pylist() == ["abc"]
+    assert table.column("insert_timestamp").to_pylist() == [inserted]
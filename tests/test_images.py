@@ -0,0 +1,30 @@
+import os
+import threading
+from io import BytesIO
+
+from PIL import Image
+
+from scraper.images import ImageStore
+
+
+def test_concurrent_saves_of_one_image(tmp_path):
+    """The same image saved from several URLs and threads at once is stored once, with every URL indexed."""
+    store = ImageStore(str(tmp_path), {"small": (32, 32)})
+    buffer = BytesIO()
+    Image.new("RGB", (64, 64), (200, 10, 10)).save(buffer, "JPEG")
+    body = buffer.getvalue()
+    keys = []
+
+    threads = [
+        threading.Thread(target=lambda i=i: keys.append(store.save(f"http://a/{i}.jpg", body, f'"{i}"', None)))
+        for i in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(keys)) == 1
+    assert os.path.exists(store.path(keys[0])) and os.path.exists(store.path(keys[0], "small"))
+    assert os.listdir(os.path.dirname(store.path(keys[0]))) == [keys[0]]
+    assert all(store.lookup(f"http://a/{i}.jpg") == (keys[0], f'"{i}"', None) for i in range(8))
@@ -0,0 +1,88 @@
+import logging
+from datetime import datetime, timezone
+
+import pytest
+
+from scraper.pipelines import InsertDataPipeline
+from scraper.spool import ItemError
+from scraper.storage import SQLiteBackend
+from scraper.validation import PriceValidator
+
+
+def make_item(ev_id: str, msrp: float, model_name: str = "model s", create_timestamp: datetime | None = None):
+    """Build an item as the spool hands it to write_batch."""
+    create_timestamp = create_timestamp or datetime(2023, 11, 10, 6, tzinfo=timezone.utc)
+    return {
+        "ev_id": ev_id,
+        "brand_name": "tesla",
+        "model_name": model_name,
+        "model_url": "http://www.tesla.com/models",
+        "car_type": "sedan",
+        "image_src": "http://www.tesla.com/models.jpg",
+        "image_key": "",
+        "msrp": msrp,
+        "create_timestamp": create_timestamp.isoformat(),
+    }
+
+
+@pytest.fixture
+def pipeline(tmp_path):
+    """Build the insert pipeline on an SQLite backend, with validation and without events or checkpoints."""
+    backend = SQLiteBackend(str(tmp_path / "ev_price.sqlite3"), table="ev_price")
+    pipeline = InsertDataPipeline(backend, str(tmp_path / "spool"), validator=PriceValidator())
+    pipeline.logger = logging.getLogger("test")
+    yield pipeline
+    backend.close()
+
+
+def prices(pipeline: InsertDataPipeline, table: str = "ev_price"):
+    """Get the model name and msrp of every row of a table."""
+    return pipeline.backend.cursor().execute(f"SELECT model_name, msrp FROM {table} ORDER BY ev_id").fetchall()
+
+
+def test_failed_history_load_is_rolled_back(pipeline, monkeypatch):
+    """A batch failing while loading the history rolls back, and its retry writes it."""
+    recent_prices = pipeline.backend.recent_prices
+
+    def timeout(since):
+        pipeline.backend.cursor()
+        raise TimeoutError("statement timeout")
+
+    monkeypatch.setattr(pipeline.backend, "recent_prices", timeout)
+    with pytest.raises(TimeoutError):
+        pipeline.write_batch([make_item("a", 74990.0)])
+    assert not pipeline.backend.connection.in_transaction
+
+    monkeypatch.setattr(pipeline.backend, "recent_prices", recent_prices)
+    pipeline.write_batch([make_item("a", 74990.0)])
+    assert prices(pipeline) == [("model s", 74990.0)]
+
+
+def test_model_with_stable_price_keeps_its_last_msrp(pipeline):
+    """A model whose last price change is older than the history window is still checked against it."""
+    pipeline.validation_history_days = 30
+    pipeline.write_batch([make_item("a", 89990.0, create_timestamp=datetime(2022, 9, 1, tzinfo=timezone.utc))])
+    pipeline.validator.loaded = False
+
+    pipeline.write_batch([make_item("b", 12000.0, create_timestamp=datetime.now(timezone.utc))])
+    assert prices(pipeline) == [("model s", 89990.0)]
+    assert prices(pipeline, "ev_price_quarantine") == [("model s", 12000.0)]
+
+
+def test_duplicate_record_does_not_become_last_msrp(pipeline):
+    """A same-day price change skipped on its duplicate ev_id leaves the validator on the msrp in the DB."""
+    pipeline.write_batch([make_item("a", 74990.0)])
+    pipeline.write_batch([make_item("a", 79990.0)])
+    assert prices(pipeline) == [("model s", 74990.0)]
+    assert pipeline.validator.score([{"brand_name": "tesla", "model_name": "model s", "msrp": 74990.0}]) == [None]
+    assert pipeline.validator.last_msrp[pipeline.validator.model_index[("tesla", "model s")]] == 74990.0
+
+
+def test_rejected_item_is_reported_by_its_index(pipeline):
+    """An item the DB rejects fails the batch with an ItemError pointing at it, and the batch is rolled back."""
+    items = [make_item("a", 74990.0), make_item("b", 89990.0, model_name="model x")]
+    items[1]["image_src"] = {"url": items[1]["image_src"]}
+    with pytest.raises(ItemError) as info:
+        pipeline.write_batch(items)
+    assert info.value.index == 1
+    assert prices(pipeline) == []
@@ -0,0 +1,48 @@
+import sqlite3
+
+from scraper.spool import ItemError, Spool, SpoolDrainer
+
+
+def drain(spool: Spool, write_batch, **kwargs):
+    """Drain a spool until it is empty."""
+    drainer = SpoolDrainer(spool, write_batch, poll_interval=0.01, retry_backoff=0, **kwargs)
+    drainer.start()
+    assert drainer.stop(timeout=10)
+
+
+def test_poison_item_is_dead_lettered(tmp_path):
+    """An item that can never be written is isolated and set aside, and every other item is written in order."""
+    spool = Spool(str(tmp_path / "spool.sqlite3"))
+    for i in range(10):
+        spool.append({"i": i, "bad": i == 6})
+    written = []
+
+    def write_batch(items):
+        for index, item in enumerate(items):
+            if item["bad"]:
+                raise ItemError(index, ValueError("value too long"))
+        written.extend(item["i"] for item in items)
+
+    drain(spool, write_batch, batch_size=4, max_retries=2)
+
+    assert written == [0, 1, 2, 3, 4, 5, 7, 8, 9]
+    assert spool.pending() == 0
+    dead = sqlite3.connect(spool.path).execute("SELECT item, error FROM dead_letter").fetchall()
+    assert len(dead) == 1 and '"i": 6' in dead[0][0] and "value too long" in dead[0][1]
+
+
+def test_batch_errors_are_retried_without_dead_lettering(tmp_path):
+    """Errors that are not blamed on an item never dead-letter it, however often they repeat."""
+    spool = Spool(str(tmp_path / "spool.sqlite3"))
+    spool.append({"i": 0})
+    attempts = []
+
+    def write_batch(items):
+        attempts.append(items)
+        if len(attempts) < 5:
+            raise RuntimeError("secret not found")
+
+    drain(spool, write_batch, max_retries=1)
+
+    assert len(attempts) == 5
+    assert sqlite3.connect(spool.path).execute("SELECT COUNT(*) FROM dead_letter").fetchone()[0] == 0
@@ -0,0 +1,126 @@
+import sqlite3
+from datetime import datetime, timezone
+
+import pytest
+
+from scraper.storage import PostgresBackend, SQLiteBackend
+
+
+def make_item(ev_id: str, model_name: str = "model s", msrp: float = 74990.0):
+    """Build an item as InsertDataPipeline writes it."""
+    return {
+        "ev_id": ev_id,
+        "brand_name": "tesla",
+        "model_name": model_name,
+        "model_url": "http://www.tesla.com/models",
+        "car_type": "sedan",
+        "image_src": "http://www.tesla.com/models.jpg",
+        "image_key": "",
+        "msrp": msrp,
+        "create_timestamp": datetime(2023, 11, 1, tzinfo=timezone.utc),
+    }
+
+
+@pytest.fixture
+def backend(tmp_path):
+    """Open an SQLite backend on a fresh file."""
+    backend = SQLiteBackend(str(tmp_path / "ev_price.sqlite3"), table="ev_price")
+    backend.open()
+    yield backend
+    backend.close()
+
+
+def count_rows(backend: SQLiteBackend):
+    """Count the rows of the price table."""
+    return backend.cursor().execute("SELECT COUNT(*) FROM ev_price").fetchone()[0]
+
+
+def test_insert_and_last_msrp(backend):
+    """An inserted item becomes its model's last msrp."""
+    assert backend.last_msrp("tesla", "model s") is None
+    assert backend.insert(make_item("a"))
+    backend.commit()
+    assert backend.last_msrp("tesla", "model s") == 74990.0
+
+
+def test_duplicate_insert_keeps_transaction(backend):
+    """A duplicate ev_id is skipped without aborting the rest of the batch."""
+    assert backend.insert(make_item("a"))
+    assert not backend.insert(make_item("a", msrp=1.0))
+    assert backend.insert(make_item("b", model_name="model 3"))
+    backend.commit()
+    assert count_rows(backend) == 2
+    assert backend.last_msrp("tesla", "model s") == 74990.0
+
+
+def test_rollback_discards_whole_batch(backend):
+    """Rolling back drops every item of the batch, not just the last one."""
+    assert backend.insert(make_item("a"))
+    assert backend.connection.in_transaction
+    assert backend.insert(make_item("b", model_name="model 3"))
+    backend.rollback()
+    assert count_rows(backend) == 0
+
+
+def test_quarantined_prices(backend):
+    """Quarantined prices of a model are read back with their timestamps, from the given timestamp on."""
+    backend.quarantine(make_item("a", msrp=7500.0), "msrp 7500.0 outside [10000.0, 1000000.0]")
+    backend.quarantine(make_item("b", model_name="model 3", msrp=7500.0), "msrp 7500.0 outside [10000.0, 1000000.0]")
+    backend.commit()
+    since = datetime(2023, 10, 30, tzinfo=timezone.utc)
+    assert backend.quarantined_prices("tesla", "model s", since) == [
+        (7500.0, datetime(2023, 11, 1, tzinfo=timezone.utc))
+    ]
+    assert backend.quarantined_prices("tesla", "model s", datetime(2023, 11, 2, tzinfo=timezone.utc)) == []
+
+
+def test_failed_open_leaves_no_connection(tmp_path, monkeypatch):
+    """A failed table creation closes the connection, so the next open creates the tables again."""
+    backend = SQLiteBackend(str(tmp_path / "ev_price.sqlite3"), table="ev_price")
+    create_table = backend.create_table
+
+    def locked():
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(backend, "create_table", locked)
+    with pytest.raises(sqlite3.OperationalError):
+        backend.open()
+    assert backend.connection is None
+
+    monkeypatch.setattr(backend, "create_table", create_table)
+    backend.open()
+    assert backend.insert(make_item("a"))
+    backend.commit()
+    assert count_rows(backend) == 1
+    backend.close()
+
+
+@pytest.mark.parametrize(
+    "migrated, expected",
+    [
+        ([], ["alter_evprice_add_image_key.sql", "alter_evprice_add_insert_timestamp.sql"]),
+        ([("image_key",)], ["alter_evprice_add_insert_timestamp.sql"]),
+        ([("image_key",), ("insert_timestamp",)], []),
+    ],
+)
+def test_postgres_migrations_skip_existing_columns(monkeypatch, migrated, expected):
+    """Opening PostgreSQL only alters the price table for columns it is still missing."""
+    backend = PostgresBackend(table="ev_price")
+    executed = []
+
+    class Cursor:
+
+        """Cursor of the information_schema query."""
+
+        def fetchall(self):
+            """Get the columns already migrated."""
+            return migrated
+
+    def execute(sql_file, params=None):
+        """Record the query and return its rows."""
+        executed.append(sql_file)
+        return Cursor()
+
+    monkeypatch.setattr(backend, "execute", execute)
+    backend.create_table()
+    assert [sql_file for sql_file in executed if sql_file.startswith("alter_")] == expected
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta, timezone
+
+from scraper.validation import PriceValidator
+
+RUN_TIMESTAMP = datetime(2023, 11, 10, 6, tzinfo=timezone.utc)
+
+
+def make_item(model_name: str, msrp: float, brand_name: str = "tesla"):
+    """Build a scored item."""
+    return {"brand_name": brand_name, "model_name": model_name, "msrp": msrp, "create_timestamp": RUN_TIMESTAMP}
+
+
+def history(model_name: str, *msrps: float):
+    """Build the recent price rows of a model, oldest first."""
+    return [("tesla", model_name, msrp) for msrp in msrps]
+
+
+def test_unknown_models_are_only_range_checked():
+    """A model without history is accepted within the plausible range and flagged outside of it."""
+    validator = PriceValidator()
+    validator.load([])
+    reasons = validator.score([make_item("model s", 74990.0), make_item("cybertruck", 2_500_000.0)])
+    assert reasons[0] is None
+    assert reasons[1].startswith("msrp 2500000.0 outside")
+
+
+def test_tesla_disclaimer_mis_parse_is_flagged():
+    """Picking up the $7,500 tax credit from a disclaimer instead of the price is flagged."""
+    validator = PriceValidator()
+    validator.load(history("model 3", 40240.0, 38990.0, 38990.0))
+    reasons = validator.score([make_item("model 3", 7500.0)])
+    assert reasons[0].startswith("msrp 7500.0 outside")
+
+
+def test_relative_delta_against_last_msrp():
+    """A jump from the model's last msrp above max_relative_delta is flagged, smaller ones are not."""
+    validator = PriceValidator()
+    validator.load(history("model x", 80000.0, 79990.0) + history("model y", 47740.0))
+    reasons = validator.score([make_item("model x", 120000.0), make_item("model y", 43990.0)])
+    assert reasons[0] == "relative delta 0.500 above 0.4"
+    assert reasons[1] is None
+
+
+def test_flat_history_uses_log_std_floor():
+    """A model whose price never changed is scored against min_log_std instead of a zero standard deviation."""
+    validator = PriceValidator(max_relative_delta=10.0)
+    validator.load(history("model s", *[90000.0] * 5))
+    reasons = validator.score([make_item("model s", 95000.0), make_item("model s", 140000.0)])
+    assert reasons[0] is None
+    assert reasons[1] == "z-score 4.42 above 4.0"
+
+
+def test_z_score_needs_min_history():
+    """A model with fewer than min_history prices is not z-scored."""
+    validator = PriceValidator(max_relative_delta=10.0)
+    validator.load(history("model s", 90000.0, 90000.0))
+    assert validator.score([make_item("model s", 140000.0)]) == [None]
+
+
+def test_unchanged_msrp_is_never_an_outlier():
+    """Once accepted, an msrp is not flagged again on later runs, even against older history."""
+    validator = PriceValidator()
+    validator.load(history("model s", 90000.0, 90000.0, 90000.0))
+    item = make_item("model s", 140000.0)
+    assert validator.score([item])[0] is not None
+    validator.update([item])
+    assert validator.score([item]) == [None]
+
+
+def test_outlier_is_accepted_after_persisting_over_daily_runs():
+    """An outlier quarantined at the same msrp on each previous daily run is accepted on its third run."""
+    validator = PriceValidator(accept_after_runs=3)
+    item = make_item("model s", 140000.0)
+    day = timedelta(days=1)
+    assert not validator.is_persistent(item, [])
+    assert not validator.is_persistent(item, [(140000.0, RUN_TIMESTAMP - day)])
+    assert not validator.is_persistent(item, [(140000.0, RUN_TIMESTAMP - 2 * day), (141000.0, RUN_TIMESTAMP - day)])
+    assert validator.is_persistent(item, [(140000.0, RUN_TIMESTAMP - 2 * day), (140000.0, RUN_TIMESTAMP - day)])
+    assert not PriceValidator(accept_after_runs=0).is_persistent(item, [(140000.0, RUN_TIMESTAMP - day)] * 3)